@@ -1,10 +1,10 @@
 import voluptuous as vol
 from homeassistant import config_entries
 import homeassistant.helpers.config_validation as cv
-import socket
-import json
 import asyncio
 
+from .light import CMD_SEARCH_DEVICES, UDP_TIMEOUT, SengledProtocol, _async_resolve
+
 DOMAIN = "sengled_udp"
 
 
@@ -43,16 +43,13 @@ class SengledConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def _test_connection(self, host: str):
         """Test if we can connect to the bulb."""
 
-        def test_udp():
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(3)
-            try:
-                # Send a test command
-                test_command = json.dumps({"func": "search_devices", "param": {}})
-                sock.sendto(test_command.encode(), (host, 9080))
-                # Try to receive response (though we don't use it for state)
-                sock.recvfrom(1024)
-            finally:
-                sock.close()
-
-        await asyncio.get_event_loop().run_in_executor(None, test_udp)
+        addr = await _async_resolve(host, 9080)
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(
+            SengledProtocol, remote_addr=addr
+        )
+        try:
+            # Send a test command and wait for any reply (we don't use it for state)
+            await protocol.request(addr, "search_devices", CMD_SEARCH_DEVICES, UDP_TIMEOUT)
+        finally:
+            transport.close()
@@ -2,7 +2,13 @@ import asyncio
 import json
 import logging
 import socket
-from typing import Any, Dict, Optional, Tuple
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - Home Assistant bundles orjson
+    orjson = None
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
@@ -18,6 +24,41 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 _LOGGER = logging.getLogger(__name__)
 
+UDP_TIMEOUT = 3
+# Seconds a successful status/brightness reply is reused before re-querying
+STATUS_CACHE_TTL = 3.0
+# Send/receive buffer size for the shared UDP socket (the kernel may clamp it)
+UDP_SOCKET_BUFFER = 1 << 20
+
+# Color temperature range and its mapping onto the bulb's 1-100 scale
+KELVIN_MIN = 2000
+KELVIN_MAX = 6500
+_DEVICE_TEMP_PER_KELVIN = 99 / (KELVIN_MAX - KELVIN_MIN)
+_KELVIN_PER_DEVICE_TEMP = (KELVIN_MAX - KELVIN_MIN) / 99
+
+
+# Pre-encoded command payloads. The bulb only speaks JSON, so the commands
+# this integration sends are kept as byte templates rather than being
+# serialized from dicts on every call.
+CMD_SEARCH_DEVICES = b'{"func":"search_devices","param":{}}'
+CMD_GET_BRIGHTNESS = b'{"func":"get_device_brightness","param":{}}'
+CMD_SWITCH_ON = b'{"func":"set_device_switch","param":{"switch":1}}'
+CMD_SWITCH_OFF = b'{"func":"set_device_switch","param":{"switch":0}}'
+CMD_SET_BRIGHTNESS = b'{"func":"set_device_brightness","param":{"brightness":%d}}'
+CMD_SET_COLOR = (
+    b'{"func":"set_device_color","param":{"red":%d,"green":%d,"blue":%d}}'
+)
+CMD_SET_COLORTEMP = (
+    b'{"func":"set_device_colortemp","param":{"colorTemperature":%d}}'
+)
+
+
+def _json_loads(data: bytes) -> Any:
+    """Decode JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -32,6 +73,194 @@ async def async_setup_entry(
     async_add_entities([light])
 
 
+def _estimate_color_temp_kelvin(r: float, g: float, b: float, w: float) -> float:
+    """Estimate color temperature from normalized RGBW PWM values.
+
+    Quadratic fit over the channel values, grouped per channel so each
+    term is a single multiply-add:
+        5r - 9.6g - 12.5b + 7.4w
+        - 0.127r² + 0.136rw + 0.277g² - 0.613gb + 0.439gw
+        + 0.33b² - 0.216bw - 0.113w² + 6245.18
+    """
+    return (
+        r * (5 - 0.127 * r + 0.136 * w)
+        + g * (-9.6 + 0.277 * g - 0.613 * b + 0.439 * w)
+        + b * (-12.5 + 0.33 * b - 0.216 * w)
+        + w * (7.4 - 0.113 * w)
+        + 6245.18
+    )
+
+
+def _compute_state(
+    r: int, g: int, b: int, w: int
+) -> Tuple[int, int, int, int, Optional[float]]:
+    """Normalize raw PWM values to 0-255 and estimate color temperature.
+
+    Returns (r, g, b, w, kelvin); kelvin is None when the W LED is off,
+    i.e. the bulb is in RGB mode.
+    """
+    max_pwm = max(r, g, b, w)
+    if max_pwm > 0:
+        r = int((r / max_pwm) * 255)
+        g = int((g / max_pwm) * 255)
+        b = int((b / max_pwm) * 255)
+        w = int((w / max_pwm) * 255)
+
+    kelvin = _estimate_color_temp_kelvin(r, g, b, w) if w > 0 else None
+    return r, g, b, w, kelvin
+
+
+class SengledProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol that matches replies to requests by bulb IP and func."""
+
+    def __init__(self) -> None:
+        """Initialize the protocol."""
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self._pending: Dict[Tuple[str, str], List[asyncio.Future]] = {}
+        # Destination of the sendto() in progress, so a send error can be pinned on it
+        self._sending_to: Optional[str] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Store the transport once the endpoint is ready."""
+        self.transport = transport
+
+    async def request(
+        self, addr: Tuple[str, int], func: str, message: bytes, timeout: float
+    ) -> Dict[str, Any]:
+        """Send message to addr and wait for the bulb's reply to func."""
+        if self.transport is None:
+            raise ConnectionResetError("UDP endpoint closed")
+        key = (addr[0], func)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(key, []).append(fut)
+        try:
+            self._sending_to = addr[0]
+            try:
+                self.transport.sendto(message, addr)
+            finally:
+                self._sending_to = None
+            return await asyncio.wait_for(fut, timeout=timeout)
+        finally:
+            waiters = self._pending.get(key)
+            if waiters and fut in waiters:
+                waiters.remove(fut)
+                if not waiters:
+                    del self._pending[key]
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        """Resolve the oldest pending future for the sender and response func."""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Received response from %s: %s",
+                addr[0],
+                data.decode(errors="replace"),
+            )
+        try:
+            response = _json_loads(data)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            response = {"raw_response": data.decode(errors="replace")}
+
+        func = response.get("func") if isinstance(response, dict) else None
+        key = (addr[0], func)
+        # Errors such as "function not find" carry no func; hand them to the
+        # oldest request still waiting on that bulb.
+        if key not in self._pending:
+            key = next((k for k in self._pending if k[0] == addr[0]), None)
+        if key is None:
+            _LOGGER.debug("Dropping unsolicited response from %s", addr[0])
+            return
+
+        waiters = self._pending[key]
+        fut = waiters.pop(0)
+        if not waiters:
+            del self._pending[key]
+        if not fut.done():
+            fut.set_result(response)
+
+    def error_received(self, exc: Exception) -> None:
+        """Fail the requests to the bulb that errored, if it is known.
+
+        The socket itself stays usable. An error that can't be tied to a bulb,
+        such as an ICMP port-unreachable reported later on Windows, only gets
+        logged and its request runs into the normal timeout, so other bulbs'
+        requests are unaffected.
+        """
+        host = self._sending_to
+        if host is None:
+            _LOGGER.warning(f"UDP socket error: {exc}")
+            return
+        _LOGGER.error(f"UDP socket error sending to {host}: {exc}")
+        for key in [k for k in self._pending if k[0] == host]:
+            for fut in self._pending.pop(key):
+                if not fut.done():
+                    fut.set_exception(exc)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """Fail every in-flight request when the endpoint closes."""
+        self.transport = None
+        self._fail_all(exc or ConnectionResetError("UDP endpoint closed"))
+
+    def _fail_all(self, exc: Exception) -> None:
+        for waiters in self._pending.values():
+            for fut in waiters:
+                if not fut.done():
+                    fut.set_exception(exc)
+        self._pending.clear()
+
+
+# One unconnected UDP endpoint serves every bulb; replies are routed by
+# source address. It is opened on first use and closed with the last entity.
+_shared_protocol: Optional[SengledProtocol] = None
+_shared_lock = asyncio.Lock()
+_shared_users = 0
+
+
+async def _async_get_shared_protocol() -> SengledProtocol:
+    """Return the shared UDP endpoint, creating it if needed."""
+    global _shared_protocol
+    # Concurrent first sends must not each open their own endpoint
+    async with _shared_lock:
+        if (
+            _shared_protocol is None
+            or _shared_protocol.transport is None
+            or _shared_protocol.transport.is_closing()
+        ):
+            loop = asyncio.get_running_loop()
+            transport, _shared_protocol = await loop.create_datagram_endpoint(
+                SengledProtocol, family=socket.AF_INET
+            )
+            _tune_socket_buffers(transport.get_extra_info("socket"))
+        return _shared_protocol
+
+
+def _tune_socket_buffers(sock: Optional[socket.socket]) -> None:
+    """Enlarge the shared socket's buffers so reply bursts from many bulbs fit."""
+    if sock is None:
+        return
+    for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, option, UDP_SOCKET_BUFFER)
+        except OSError as e:
+            # The kernel may clamp or refuse the size; defaults still work
+            _LOGGER.debug("Could not set socket buffer option %s: %s", option, e)
+
+
+def _close_shared_endpoint() -> None:
+    """Close the shared endpoint so the next command re-creates it."""
+    global _shared_protocol
+    if _shared_protocol is not None and _shared_protocol.transport is not None:
+        _shared_protocol.transport.close()
+    _shared_protocol = None
+
+
+async def _async_resolve(host: str, port: int) -> Tuple[str, int]:
+    """Resolve host to the IPv4 address replies will come from."""
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        host, port, family=socket.AF_INET, type=socket.SOCK_DGRAM
+    )
+    return infos[0][4][:2]
+
+
 class SengledLight(LightEntity):
     """Representation of a Sengled UDP Light."""
 
@@ -41,6 +270,9 @@ class SengledLight(LightEntity):
         self._name = name
         self._unique_id = unique_id
         self._port = 9080
+        self._addr: Optional[Tuple[str, int]] = None
+        self._status_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._brightness_cache: Optional[Tuple[float, Dict[str, Any]]] = None
 
         # State will be fetched from device
         self._is_on = False
@@ -55,8 +287,8 @@ class SengledLight(LightEntity):
         self._attr_color_mode = ColorMode.RGB
         self._attr_supported_color_modes = {ColorMode.RGB, ColorMode.COLOR_TEMP}
 
-        self._attr_min_color_temp_kelvin = 2000
-        self._attr_max_color_temp_kelvin = 6500
+        self._attr_min_color_temp_kelvin = KELVIN_MIN
+        self._attr_max_color_temp_kelvin = KELVIN_MAX
 
     @property
     def is_on(self) -> bool:
@@ -83,22 +315,46 @@ class SengledLight(LightEntity):
         """Return the color temperature in Kelvin."""
         return self._color_temp_kelvin
 
+    async def async_added_to_hass(self) -> None:
+        """Register as a user of the shared UDP endpoint."""
+        global _shared_users
+        _shared_users += 1
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Close the shared UDP endpoint once the last entity is removed."""
+        global _shared_users
+        _shared_users = max(0, _shared_users - 1)
+        if _shared_users == 0:
+            _close_shared_endpoint()
+
     async def async_update(self) -> None:
         """Fetch new state data for this light."""
-        status = await self._get_device_status()
+        # Both queries are independent, so keep them in flight together
+        status, brightness_info = await asyncio.gather(
+            self._get_device_status(),
+            self._get_device_brightness(),
+            return_exceptions=True,
+        )
+        if isinstance(status, Exception):
+            _LOGGER.error(f"Status query raised: {status}")
+            status = None
+        if isinstance(brightness_info, Exception):
+            _LOGGER.error(f"Brightness query raised: {brightness_info}")
+            brightness_info = None
+
         if status:
-            # Also get the actual brightness from the device
-            brightness_info = await self._get_device_brightness()
             self._update_state_from_status(status, brightness_info)
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on the light."""
+        commands: List[Tuple[str, bytes]] = []
+
         # Handle color temperature
         if ATTR_COLOR_TEMP_KELVIN in kwargs:
             color_temp_kelvin = kwargs[ATTR_COLOR_TEMP_KELVIN]
             device_temp = self._kelvin_to_device_temp(color_temp_kelvin)
-            await self._send_command(
-                "set_device_colortemp", {"colorTemperature": device_temp}
+            commands.append(
+                ("set_device_colortemp", CMD_SET_COLORTEMP % device_temp)
             )
             self._color_temp_kelvin = color_temp_kelvin
             self._color_mode = ColorMode.COLOR_TEMP
@@ -108,9 +364,7 @@ class SengledLight(LightEntity):
         # Handle RGB color (only if not setting color temp)
         elif ATTR_RGB_COLOR in kwargs:
             rgb = kwargs[ATTR_RGB_COLOR]
-            await self._send_command(
-                "set_device_color", {"red": rgb[0], "green": rgb[1], "blue": rgb[2]}
-            )
+            commands.append(("set_device_color", CMD_SET_COLOR % tuple(rgb)))
             self._rgb_color = rgb
             self._color_mode = ColorMode.RGB
             # Clear color temp when using RGB
@@ -120,31 +374,41 @@ class SengledLight(LightEntity):
         if ATTR_BRIGHTNESS in kwargs:
             brightness = kwargs[ATTR_BRIGHTNESS]
             brightness_percent = int((brightness / 255) * 100)
-            await self._send_command(
-                "set_device_brightness", {"brightness": brightness_percent}
+            commands.append(
+                ("set_device_brightness", CMD_SET_BRIGHTNESS % brightness_percent)
             )
             self._brightness = brightness
 
         # Turn on the light if not already handling colors
         if ATTR_COLOR_TEMP not in kwargs and ATTR_RGB_COLOR not in kwargs:
-            await self._send_command("set_device_switch", {"switch": 1})
+            commands.append(("set_device_switch", CMD_SWITCH_ON))
+
+        await self._send_commands_batched(commands)
 
+        self._invalidate_cache()
         self._is_on = True
         self.async_write_ha_state()
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off the light."""
-        await self._send_command("set_device_switch", {"switch": 0})
+        await self._send_raw("set_device_switch", CMD_SWITCH_OFF)
+        self._invalidate_cache()
         self._is_on = False
         self.async_write_ha_state()
 
     async def _get_device_status(self) -> Optional[Dict[str, Any]]:
         """Get the current device status using search_devices command."""
-        response = await self._send_command("search_devices", {})
+        if self._status_cache is not None:
+            cached_at, cached = self._status_cache
+            if time.monotonic() - cached_at < STATUS_CACHE_TTL:
+                return cached
+
+        response = await self._send_raw("search_devices", CMD_SEARCH_DEVICES)
 
         if response and "result" in response:
             result = response["result"]
             if result.get("ret") == 0:  # Success
+                self._status_cache = (time.monotonic(), result)
                 return result
             else:
                 _LOGGER.warning(
@@ -155,11 +419,17 @@ class SengledLight(LightEntity):
 
     async def _get_device_brightness(self) -> Optional[Dict[str, Any]]:
         """Get the current device brightness using get_device_brightness command."""
-        response = await self._send_command("get_device_brightness", {})
+        if self._brightness_cache is not None:
+            cached_at, cached = self._brightness_cache
+            if time.monotonic() - cached_at < STATUS_CACHE_TTL:
+                return cached
+
+        response = await self._send_raw("get_device_brightness", CMD_GET_BRIGHTNESS)
 
         if response and "result" in response:
             result = response["result"]
             if result.get("ret") == 0:  # Success
+                self._brightness_cache = (time.monotonic(), result)
                 return result
             else:
                 _LOGGER.warning(
@@ -168,54 +438,44 @@ class SengledLight(LightEntity):
 
         return None
 
+    def _invalidate_cache(self) -> None:
+        """Drop cached device state so the next update reads from the bulb."""
+        self._status_cache = None
+        self._brightness_cache = None
+
     def _update_state_from_status(
         self, status: Dict[str, Any], brightness_info: Optional[Dict[str, Any]] = None
     ) -> None:
         """Update internal state from device status."""
         try:
             # Extract RGBW values and frequencies
-            r_value = status.get("R", {}).get("value", 0)
-            g_value = status.get("G", {}).get("value", 0)
-            b_value = status.get("B", {}).get("value", 0)
-            w_value = status.get("W", {}).get("value", 0)
+            r_channel = status.get("R") or {}
+            g_channel = status.get("G") or {}
+            b_channel = status.get("B") or {}
+            w_channel = status.get("W") or {}
 
-            r_freq = status.get("R", {}).get("freq", 1)
-            g_freq = status.get("G", {}).get("freq", 1)
-            b_freq = status.get("B", {}).get("freq", 1)
-            w_freq = status.get("W", {}).get("freq", 1)
+            r_value = r_channel.get("value", 0)
+            g_value = g_channel.get("value", 0)
+            b_value = b_channel.get("value", 0)
+            w_value = w_channel.get("value", 0)
+
+            r_freq = r_channel.get("freq", 1)
+            g_freq = g_channel.get("freq", 1)
+            b_freq = b_channel.get("freq", 1)
+            w_freq = w_channel.get("freq", 1)
 
             # Device is on if any LED frequency is 0
-            self._is_on = any(freq == 0 for freq in [r_freq, g_freq, b_freq, w_freq])
+            self._is_on = r_freq == 0 or g_freq == 0 or b_freq == 0 or w_freq == 0
 
-            # Normalize PWM values
-            max_pwm = max(r_value, g_value, b_value, w_value)
-            if max_pwm > 0:
-                r_value = int((r_value / max_pwm) * 255)
-                g_value = int((g_value / max_pwm) * 255)
-                b_value = int((b_value / max_pwm) * 255)
-                w_value = int((w_value / max_pwm) * 255)
+            r_value, g_value, b_value, w_value, kelvin = _compute_state(
+                r_value, g_value, b_value, w_value
+            )
 
             if self._is_on:
                 # Check if W LED is active (non-zero value) for color temperature mode
-                if w_value > 0:
+                if kelvin is not None:
                     self._color_mode = ColorMode.COLOR_TEMP
-
-                    # Estimate the color temperature in Kelvin
-                    self._color_temp_kelvin = (
-                        5 * r_value
-                        - 9.6 * g_value
-                        - 12.5 * b_value
-                        + 7.4 * w_value
-                        - 0.127 * r_value**2
-                        + 0.136 * r_value * w_value
-                        + 0.277 * g_value**2
-                        - 0.613 * g_value * b_value
-                        + 0.439 * g_value * w_value
-                        + 0.33 * b_value**2
-                        - 0.216 * b_value * w_value
-                        - 0.113 * w_value**2
-                        + 6245.18
-                    )
+                    self._color_temp_kelvin = kelvin
                     self._rgb_color = None
                 else:
                     # RGB color mode - W LED is not active
@@ -234,14 +494,18 @@ class SengledLight(LightEntity):
                     device_brightness = brightness_info["brightness"]
                     self._brightness = min(255, int((device_brightness / 100) * 255))
                     _LOGGER.debug(
-                        f"Got brightness from device: {device_brightness}% -> {self._brightness}"
+                        "Got brightness from device: %s%% -> %s",
+                        device_brightness,
+                        self._brightness,
                     )
                 else:
                     # Fallback to estimation if brightness query failed
                     max_channel_value = max(r_value, g_value, b_value, w_value)
                     self._brightness = min(255, int((max_channel_value / 100) * 255))
                     _LOGGER.debug(
-                        f"Estimated brightness from max channel value: {max_channel_value} -> {self._brightness}"
+                        "Estimated brightness from max channel value: %s -> %s",
+                        max_channel_value,
+                        self._brightness,
                     )
             else:
                 # Light is off - keep last known color mode and values
@@ -249,59 +513,90 @@ class SengledLight(LightEntity):
 
             self._available = True
             _LOGGER.debug(
-                f"Updated state: on={self._is_on}, brightness={self._brightness}, mode={self._color_mode}, rgb={self._rgb_color}, temp_kelvin={self._color_temp_kelvin}, RGBW=({r_value},{g_value},{b_value},{w_value}), freq=({r_freq},{g_freq},{b_freq},{w_freq})"
+                "Updated state: on=%s, brightness=%s, mode=%s, rgb=%s, temp_kelvin=%s, RGBW=(%s,%s,%s,%s), freq=(%s,%s,%s,%s)",
+                self._is_on,
+                self._brightness,
+                self._color_mode,
+                self._rgb_color,
+                self._color_temp_kelvin,
+                r_value,
+                g_value,
+                b_value,
+                w_value,
+                r_freq,
+                g_freq,
+                b_freq,
+                w_freq,
             )
 
         except Exception as e:
             _LOGGER.error(f"Error updating state from status: {e}")
             self._available = False
 
-    async def _send_command(
-        self, func: str, param: Dict[str, Any]
-    ) -> Optional[Dict[str, Any]]:
-        """Send UDP command to the bulb."""
-        command = {"func": func, "param": param}
-
-        def send_udp():
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(3)
-            try:
-                message = json.dumps(command)
-                _LOGGER.debug(f"Sending to {self._host}:{self._port}: {message}")
-                sock.sendto(message.encode(), (self._host, self._port))
-
-                # Try to receive response
-                try:
-                    response, _ = sock.recvfrom(1024)
-                    response_str = response.decode()
-                    _LOGGER.debug(f"Received response: {response_str}")
-                    try:
-                        return json.loads(response_str)
-                    except json.JSONDecodeError:
-                        return {"raw_response": response_str}
-                except socket.timeout:
-                    _LOGGER.warning(f"No response from {self._host}")
-                    return None
-            except Exception as e:
-                _LOGGER.error(f"Error sending command to {self._host}: {e}")
-                return None
-            finally:
-                sock.close()
+    async def _async_prepare(self) -> Optional[SengledProtocol]:
+        """Resolve the bulb address (once) and return the shared UDP endpoint."""
+        try:
+            if self._addr is None:
+                self._addr = await _async_resolve(self._host, self._port)
+            return await _async_get_shared_protocol()
+        except OSError as e:
+            _LOGGER.error(f"Error opening UDP endpoint to {self._host}: {e}")
+            return None
 
+    async def _request(
+        self, protocol: SengledProtocol, func: str, message: bytes
+    ) -> Optional[Dict[str, Any]]:
+        """Send on a prepared endpoint; nothing awaits before the datagram leaves."""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Sending to %s:%s: %s", self._host, self._port, message.decode()
+            )
         try:
-            return await asyncio.get_event_loop().run_in_executor(None, send_udp)
-        except Exception as e:
-            _LOGGER.error(f"Failed to send command: {e}")
+            return await protocol.request(self._addr, func, message, UDP_TIMEOUT)
+        except asyncio.TimeoutError:
+            _LOGGER.warning(f"No response from {self._host}")
+            return None
+        except OSError as e:
+            # A closed endpoint is re-created by the next _async_prepare();
+            # errors for this bulb alone leave it open for the others
+            _LOGGER.error(f"Error sending command to {self._host}: {e}")
             return None
 
+    async def _send_raw(self, func: str, message: bytes) -> Optional[Dict[str, Any]]:
+        """Send a pre-encoded UDP command and wait for the reply to func."""
+        protocol = await self._async_prepare()
+        if protocol is None:
+            return None
+        return await self._request(protocol, func, message)
+
+    async def _send_commands_batched(
+        self, commands: List[Tuple[str, bytes]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Send several UDP commands back-to-back and await their replies together.
+
+        The address and endpoint are prepared once up front, so the gathered
+        sends start in list order and the bulb applies them in the same order
+        as sequential sends would.
+        """
+        if not commands:
+            return []
+        protocol = await self._async_prepare()
+        if protocol is None:
+            return [None] * len(commands)
+        return list(
+            await asyncio.gather(
+                *(self._request(protocol, func, message) for func, message in commands)
+            )
+        )
+
     def _kelvin_to_device_temp(self, kelvin: int) -> int:
         """Convert kelvin to device temperature (1-100 scale)."""
 
-        device_temp = int(1 + ((kelvin - 2000) / (6500 - 2000)) * 99)
+        device_temp = int(1 + (kelvin - KELVIN_MIN) * _DEVICE_TEMP_PER_KELVIN)
         return max(1, min(100, device_temp))
 
     def _device_temp_to_kelvin(self, device_temp: int) -> int:
         """Convert device temperature (1-100 scale) to kelvin."""
 
-        kelvin = int(2000 + ((device_temp - 1) / 99) * (6500 - 2000))
-        return max(2000, min(6500, kelvin))
+        kelvin = int(KELVIN_MIN + (device_temp - 1) * _KELVIN_PER_DEVICE_TEMP)
+        return max(KELVIN_MIN, min(KELVIN_MAX, kelvin))
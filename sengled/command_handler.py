@@ -6,30 +6,27 @@ Handles both UDP and MQTT commands for individual and group control.
 import json
 import sys
 import time
-import os
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 from .log import warn, info, step, debug, say, success
-from .mqtt_client import (
-    MQTTClient,
-    send_update_command,
-    publish_topic,
-)
 from .utils import (
     get_local_ip,
     get_current_epoch_ms,
 )
-from .http_server import SetupHTTPServer
 from .udp import send_udp_command
-from .firmware_upgrade import (
-    prepare_firmware_bin,
-    print_upgrade_safety_warning,
-    print_morpheus_last_chance,
-    print_upgrade_post_send_instructions,
-)
 from .constants import BROKER_TLS_PORT, DEFAULT_BROKER_PORT
 
+# The MQTT stack (paho + ssl) is imported inside the MQTT handlers so that
+# UDP-only invocations don't pay for it at startup.
+if TYPE_CHECKING:
+    from .mqtt_client import MQTTClient
+
 
 def build_cmd(dn: str, cmd_type: str, value: str, ts: int | None = None) -> dict:
     if ts is None:
@@ -100,13 +97,13 @@ class CommandHandler:
                 sys.exit(2)
         elif self.args.udp_json:
             try:
-                custom = json.loads(self.args.udp_json)
+                custom = _json_loads(self.args.udp_json)
                 if not isinstance(custom, dict):
                     warn("--udp-json must be a JSON object")
                     sys.exit(2)
                 else:
                     send_udp_command(self.args.ip, custom)
-            except json.JSONDecodeError:
+            except (json.JSONDecodeError, ValueError):
                 warn("Invalid JSON for --udp-json")
                 sys.exit(2)
         else:
@@ -116,13 +113,17 @@ class CommandHandler:
             sys.exit(2)
 
     @staticmethod
-    def send_reset_command(client: MQTTClient, mac: str) -> None:
+    def send_reset_command(client: "MQTTClient", mac: str) -> None:
         """Send a reset command to a single bulb via MQTT."""
+        from .mqtt_client import send_update_command
+
         command = build_cmd_list(mac, "reset", "1")
         send_update_command(client, mac, command)
 
     def handle_group_mqtt_control(self):
         """Handle MQTT commands for group control."""
+        from .mqtt_client import send_update_command
+
         # Initialize MQTT client for group control (TLS via factory)
         # Resolve target for control; prefer embedded when not explicitly provided
         ctrl_host_for_bulb, ctrl_port, mode = self.tool._resolve_mqtt_target(
@@ -187,6 +188,15 @@ class CommandHandler:
 
     def handle_single_mqtt_control(self):
         """Handle MQTT commands for single bulb control."""
+        from .mqtt_client import send_update_command, publish_topic
+        from .firmware_upgrade import (
+            prepare_firmware_bin,
+            resolve_firmware_path,
+            print_upgrade_safety_warning,
+            print_morpheus_last_chance,
+            print_upgrade_post_send_instructions,
+        )
+
         prefer_embedded = self.args.embedded or not bool(self.args.broker_ip)
         ctrl_host_for_bulb, ctrl_port, mode = self.tool._resolve_mqtt_target(
             prefer_embedded=prefer_embedded, context="control"
@@ -214,17 +224,20 @@ class CommandHandler:
                     warn("Failed to send custom message.")
                 return
 
+            # One timestamp for every command built in this invocation
+            ts = get_current_epoch_ms()
+
             if self.args.on:
-                command = build_cmd_list(self.args.mac, "switch", "1")
+                command = build_cmd_list(self.args.mac, "switch", "1", ts)
                 send_update_command(client, self.args.mac, command)
 
             elif self.args.off:
-                command = build_cmd_list(self.args.mac, "switch", "0")
+                command = build_cmd_list(self.args.mac, "switch", "0", ts)
                 send_update_command(client, self.args.mac, command)
 
             elif self.args.brightness is not None:
                 if 0 <= self.args.brightness <= 100:
-                    command = build_cmd_list(self.args.mac, "brightness", str(self.args.brightness))
+                    command = build_cmd_list(self.args.mac, "brightness", str(self.args.brightness), ts)
                     send_update_command(client, self.args.mac, command)
                 else:
                     warn("Brightness must be between 0 and 100")
@@ -237,7 +250,7 @@ class CommandHandler:
                     r, g, b = int(r), int(g), int(b)
                     if all(0 <= val <= 255 for val in [r, g, b]):
                         color_dec = f"{r:d}:{g:d}:{b:d}"
-                        commands = build_cmd_list(self.args.mac, "color", color_dec)
+                        commands = build_cmd_list(self.args.mac, "color", color_dec, ts)
                         send_update_command(client, self.args.mac, commands)
                     else:
                         warn("Color values must be between 0 and 255")
@@ -254,8 +267,8 @@ class CommandHandler:
             elif self.args.color_temp is not None:
                 if 0 <= self.args.color_temp <= 100:
                     cmds = []
-                    cmds += build_cmd_list(self.args.mac, "colorTemperature", str(self.args.color_temp))
-                    cmds += build_cmd_list(self.args.mac, "switch", "1")
+                    cmds += build_cmd_list(self.args.mac, "colorTemperature", str(self.args.color_temp), ts)
+                    cmds += build_cmd_list(self.args.mac, "switch", "1", ts)
                     commands = cmds
                     send_update_command(client, self.args.mac, commands)
                 else:
@@ -263,42 +276,40 @@ class CommandHandler:
                     sys.exit(2)
 
             elif self.args.effect_status is not None:
-                command = build_cmd_list(self.args.mac, "effectStatus", str(self.args.effect_status))
+                command = build_cmd_list(self.args.mac, "effectStatus", str(self.args.effect_status), ts)
                 send_update_command(client, self.args.mac, command)
 
             elif self.args.upgrade:
                 step("Firmware: flashing")
                 print_upgrade_safety_warning()
-                firmware_path = os.path.expanduser(self.args.upgrade)
-                if not os.path.isfile(firmware_path):
-                    warn(f"Firmware file '{firmware_path}' does not exist.")
+                firmware_path = resolve_firmware_path(self.args.upgrade)
+                if not firmware_path:
                     sys.exit(2)
                 if not self.tool._probe_broker("127.0.0.1", 8883):
                     warn("Port 8883 is not listening on your PC. Start sengled_tool.py --run-servers in another terminal first. Also good to test MQTT commands like --brightness before flashing.")
                     sys.exit(2)
-                firmware_bin = prepare_firmware_bin(self.args.upgrade)
+                firmware_bin = prepare_firmware_bin(firmware_path)
                 if not firmware_bin:
-                    sys.exit(2)  # Abort if validation or copy fails
-                upgrade_broker_host = get_local_ip()
-                upgrade_broker_port = 8883
+                    sys.exit(2)  # Abort if the copy fails
                 local_ip = get_local_ip()
                 http_port = 57542
-                firmware_filename = os.path.basename(firmware_path)
-                firmware_url = f"http://{local_ip}:{http_port}/{firmware_filename}"
+                firmware_url = f"http://{local_ip}:{http_port}/{firmware_bin}"
                 info(f"Will request firmware upgrade URL: {firmware_url}")
 
                 print_morpheus_last_chance()
                 command = build_cmd_list(self.args.mac, "update", firmware_url)
-                send_update_command(client, self.args.mac, command)
+                # QoS 1: don't report a flash the broker never acknowledged
+                if send_update_command(client, self.args.mac, command, qos=1) is None:
+                    sys.exit(2)
                 print_upgrade_post_send_instructions()
 
             elif self.args.reset:
-                command = build_cmd_list(self.args.mac, "reset", "1")
-                send_update_command(client, self.args.mac, command)
+                command = build_cmd_list(self.args.mac, "reset", "1", ts)
+                send_update_command(client, self.args.mac, command, qos=1)
 
             elif self.args.custom_payload:
                 try:
-                    payload_list = json.loads(self.args.custom_payload)
+                    payload_list = _json_loads(self.args.custom_payload)
                     if not isinstance(payload_list, list):
                         warn("Custom payload must be a JSON array (a list of objects).")
                         sys.exit(2)
@@ -306,7 +317,7 @@ class CommandHandler:
                     info(f"Sending custom payload: {self.args.custom_payload}")
                     send_update_command(client, self.args.mac, payload_list)
 
-                except json.JSONDecodeError:
+                except (json.JSONDecodeError, ValueError):
                     warn("Invalid JSON payload for --custom-payload.")
                     sys.exit(2)
 
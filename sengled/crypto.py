@@ -8,11 +8,65 @@ Extracted from sengled_tool.py for modular use.
 import base64
 import json
 
+# Optional C-backed RC4. cryptography's ARC4 caps keys at 32 bytes, which is
+# too short for the app's 52-byte key, so PyCryptodome is used when present.
+try:
+    from Crypto.Cipher import ARC4 as _ARC4
+except ImportError:
+    _ARC4 = None
+
 # --- RC4 Crypto for Local Wi-Fi Setup ---
 # Note: RC4 is used because it's what the Sengled app uses
 # This is NOT cryptographically secure - it's just for protocol compatibility
 # The key is hardcoded in the app and provides no real security
 KEY_STR = "MTlCaWppbmdTaGFuZ2hhaVdpU2VuZ2xlZEZpMjBBQUJBU0U2NA=="  # literal string used by the app
+_KEY_BYTES = KEY_STR.encode('utf-8')
+
+
+def _rc4_ksa(key):
+    """RC4 key-scheduling algorithm. Returns the initial S-box as bytes."""
+    S = bytearray(range(256))
+    j = 0
+    key_len = len(key)
+
+    for i in range(256):
+        j = (j + S[i] + key[i % key_len]) % 256
+        S[i], S[j] = S[j], S[i]
+
+    return bytes(S)
+
+
+def _rc4_keystream(S, length):
+    """RC4 PRGA. Returns `length` keystream bytes, mutating the S-box in place."""
+    i = j = 0
+    out = bytearray(length)
+    for n in range(length):
+        i = (i + 1) & 0xFF
+        Si = S[i]
+        j = (j + Si) & 0xFF
+        Sj = S[j]
+        S[i] = Sj
+        S[j] = Si
+        out[n] = S[(Si + Sj) & 0xFF]
+
+    return out
+
+
+# The app key never changes, so its key schedule is computed once
+_INITIAL_SBOX = _rc4_ksa(_KEY_BYTES)
+
+# Keystream for the app key, grown on demand. Every message restarts RC4 from
+# the same key, so the pure-Python fallback only has to run the PRGA once.
+_app_keystream_cache = b""
+
+
+def _app_keystream(length):
+    """Return the first `length` keystream bytes for the app key."""
+    global _app_keystream_cache
+    if len(_app_keystream_cache) < length:
+        size = max(1024, 1 << (length - 1).bit_length())
+        _app_keystream_cache = bytes(_rc4_keystream(bytearray(_INITIAL_SBOX), size))
+    return _app_keystream_cache[:length]
 
 class SengledWiFiCrypto:
     """Wi-Fi setup crypto handler for Sengled devices"""
@@ -30,11 +84,8 @@ class SengledWiFiCrypto:
         else:
             data_bytes = data
         
-        # Use the key format used by the app
-        key = KEY_STR.encode('utf-8')
-        
-        # RC4 encrypt
-        encrypted = self._rc4_crypt(data_bytes, key)
+        # RC4 encrypt with the key format used by the app
+        encrypted = self._rc4_crypt(data_bytes, _KEY_BYTES)
         
         # Return base64 format: base64(ciphertext)
         return base64.b64encode(encrypted).decode('utf-8')
@@ -45,42 +96,36 @@ class SengledWiFiCrypto:
             ciphertext = base64.b64decode(b64_str)
             
             # Use the same key format as encrypt
-            key = KEY_STR.encode('utf-8')
-            decrypted = self._rc4_crypt(ciphertext, key)
+            decrypted = self._rc4_crypt(ciphertext, _KEY_BYTES)
             return json.loads(decrypted.decode('utf-8'))
         except Exception as e:
             return f"RC4 Decryption Failed: {e}"
     
-    def _rc4_crypt(self, data, key):
+    @staticmethod
+    def _rc4_crypt(data, key):
         """RC4 encryption/decryption (same operation)"""
-        S = list(range(256))
-        j = 0
-        key_len = len(key)
-        
-        for i in range(256):
-            j = (j + S[i] + key[i % key_len]) % 256
-            S[i], S[j] = S[j], S[i]
-        
-        i = j = 0
-        out = bytearray()
-        for byte in data:
-            i = (i + 1) % 256
-            j = (j + S[i]) % 256
-            S[i], S[j] = S[j], S[i]
-            K = S[(S[i] + S[j]) % 256]
-            out.append(byte ^ K)
-        
-        return bytes(out)
+        if _ARC4 is not None:
+            return _ARC4.new(key).encrypt(bytes(data))
+
+        if key == _KEY_BYTES:
+            keystream = _app_keystream(len(data))
+        else:
+            keystream = _rc4_keystream(bytearray(_rc4_ksa(key)), len(data))
+
+        # XOR the whole buffer at once as big integers rather than per byte
+        mixed = int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')
+        return mixed.to_bytes(len(data), 'big')
+
+# SengledWiFiCrypto is stateless, so one shared instance serves every caller
+_CRYPTO = SengledWiFiCrypto()
 
 def encrypt_wifi_payload(data):
     """Encrypt Wi-Fi setup payload using RC4"""
-    crypto = SengledWiFiCrypto()
-    return crypto.encrypt_wifi_payload(data)
+    return _CRYPTO.encrypt_wifi_payload(data)
 
 def decrypt_wifi_payload(b64_str):
     """Decrypt Wi-Fi setup payload using RC4"""
-    crypto = SengledWiFiCrypto()
-    return crypto.decrypt_wifi_payload(b64_str)
+    return _CRYPTO.decrypt_wifi_payload(b64_str)
 
 __all__ = [
     'SengledWiFiCrypto', 
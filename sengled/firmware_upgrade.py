@@ -3,23 +3,38 @@ import shutil
 from sengled.log import section, info, warn, success, stop, firmware_warn
 
 
-def prepare_firmware_bin(user_path):
+def resolve_firmware_path(user_path):
+    """Expand and validate a user-supplied firmware path. Returns None if unusable."""
     user_path = os.path.expanduser(user_path)
     if not os.path.isfile(user_path):
-        warn(f"File does not exist: {user_path}")
+        warn(f"Firmware file '{user_path}' does not exist.")
         return None
 
-    basename = os.path.basename(user_path)
-    if not basename.lower().endswith(".bin"):
+    if not user_path.lower().endswith(".bin"):
         warn("Firmware file must have a .bin extension.")
         return None
 
+    return user_path
+
+
+def prepare_firmware_bin(user_path):
+    """Stage a path from resolve_firmware_path next to the HTTP server; returns its basename."""
+    basename = os.path.basename(user_path)
     script_dir = os.path.dirname(os.path.abspath(__file__))
     dest_path = os.path.join(script_dir, basename)
 
     if os.path.isfile(dest_path):
         return basename
 
+    # A hardlink adds a directory entry without copying any bytes; fall back
+    # to a real copy across filesystems or where links aren't permitted.
+    try:
+        os.link(user_path, dest_path)
+        success(f"Firmware file linked to: {dest_path}")
+        return basename
+    except OSError:
+        pass
+
     try:
         shutil.copy2(user_path, dest_path)
         success(f"Firmware file copied to: {dest_path}")
@@ -91,13 +106,15 @@ def run_firmware_upgrade(args, bulb_mac: str, setup_server, client) -> bool:
             return False
     else:
         user_fw = default_fw
-    fw_basename = prepare_firmware_bin(user_fw)
+    fw_path = resolve_firmware_path(user_fw)
+    fw_basename = prepare_firmware_bin(fw_path) if fw_path else None
 
     if not fw_basename:
         stop("Firmware preparation failed. Aborting upgrade.")
         return False
 
-    http_host = get_local_ip()
+    # The PC has usually left the bulb AP by now; don't reuse a stale address
+    http_host = get_local_ip(refresh=True)
     http_port = str(setup_server.port)
     firmware_url = f"http://{http_host}:{http_port}/{fw_basename}"
     info(f"Serving firmware from: {firmware_url}")
@@ -113,15 +130,19 @@ def run_firmware_upgrade(args, bulb_mac: str, setup_server, client) -> bool:
             "time": ts,
         }
     ]
-    send_update_command(client, bulb_mac, command)
-    
+    if send_update_command(client, bulb_mac, command, qos=1) is None:
+        stop("Upgrade command was not acknowledged by the broker. Aborting upgrade.")
+        return False
+
     success("Upgrade command sent.")
     print_upgrade_post_send_instructions(concise=True)
-    
-    # Wait for the bulb to download the firmware
-    setup_server.wait_for_firmware_download(timeout_seconds=300)
-    info("Firmware download initiated by bulb.")
-    
+
+    # Block on the server's download event; it is set as soon as the .bin is served
+    if setup_server.wait_for_firmware_download(timeout_seconds=300):
+        info("Firmware download initiated by bulb.")
+    else:
+        warn("Bulb did not download the firmware within 5 minutes.")
+
     return True
 
 
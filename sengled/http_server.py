@@ -2,14 +2,50 @@ import json
 import os
 import threading
 import time
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+import socket
 import socketserver
 from typing import Optional
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 
 from sengled.log import debug, info, ok, say, warn, success, is_verbose, get_indent, set_indent, waiting, stop
 
 
+def _build_json_response(payload: bytes) -> bytes:
+    """Return a complete HTTP/1.1 200 response (status line, headers, body) for a JSON payload.
+
+    Matches the handler's protocol_version; Content-Length lets the client
+    reuse the connection for its next request.
+    """
+    head = (
+        "HTTP/1.1 200 OK\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + payload
+
+
+# Upper bound for a /status?wait=N long-poll, in seconds
+_STATUS_MAX_WAIT = 60.0
+
+# Firmware images are served only from this package directory
+_FW_ROOT = os.path.realpath(os.path.dirname(__file__))
+
+# Fixed replies, encoded once at import
+_ACCESS_CLOUD_PAYLOAD = json.dumps(
+    {
+        "messageCode": "200",
+        "info": "OK",
+        "description": "正常",
+        "success": True,
+    }
+).encode("utf-8")
+_ACCESS_CLOUD_RESPONSE = _build_json_response(_ACCESS_CLOUD_PAYLOAD)
+_RESET_PAYLOAD = json.dumps({"reset": "success"}).encode("utf-8")
+_RESET_RESPONSE = _build_json_response(_RESET_PAYLOAD)
+
+
 class SetupHTTPServer:
     """Lightweight HTTP server used during Wi‑Fi setup.
 
@@ -22,6 +58,11 @@ class SetupHTTPServer:
     def __init__(self, mqtt_host: str, mqtt_port: int, preferred_port: int = 57542):
         self.mqtt_host = mqtt_host
         self.mqtt_port = mqtt_port
+        # The broker address never changes for this server, so encode once
+        self._bimqtt_payload = json.dumps(
+            {"protocal": "mqtt", "host": mqtt_host, "port": mqtt_port}
+        ).encode("utf-8")
+        self._bimqtt_response = _build_json_response(self._bimqtt_payload)
         self.preferred_port = preferred_port
         self.server: Optional[HTTPServer] = None
         self.thread: Optional[threading.Thread] = None
@@ -36,63 +77,94 @@ class SetupHTTPServer:
         self._firmware_served = threading.Event()
         self.last_firmware_filename: Optional[str] = None
 
+        # Bulb endpoints with fixed replies:
+        # (method, path) -> (hit event, full response, payload for debug logging)
+        self._routes = {
+            ("POST", "/life2/device/accessCloud.json"): (
+                self._hit_access_cloud, _ACCESS_CLOUD_RESPONSE, _ACCESS_CLOUD_PAYLOAD
+            ),
+            ("GET", "/jbalancer/new/bimqtt"): (
+                self._hit_bimqtt, self._bimqtt_response, self._bimqtt_payload
+            ),
+        }
+
     def _make_handler(self):
         outer = self
 
         class Handler(BaseHTTPRequestHandler):
+            # Keep-alive: every response carries an exact Content-Length, so a bulb
+            # retrying an endpoint or the firmware GET can reuse its TCP connection
+            protocol_version = "HTTP/1.1"
+            # Drop idle keep-alive connections instead of holding a thread forever
+            timeout = 30
+
             def _send_json(self, data: dict):
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                payload = json.dumps(data).encode("utf-8")
-                self.send_header("Content-Length", str(len(payload)))
-                self.end_headers()
-                self.wfile.write(payload)
-                debug(f"sent: {payload}")
+                self._send_raw_json(json.dumps(data).encode("utf-8"))
+
+            def _send_raw_json(self, payload: bytes):
+                # Status line, headers and body go out in a single write
+                self.wfile.write(_build_json_response(payload))
+                if is_verbose():
+                    debug(f"sent: {payload}")
+
+            def _serve_route(self, path: str) -> bool:
+                """Answer a bulb endpoint from the route table. Returns False if path isn't one for this method."""
+                route = outer._routes.get((self.command, path))
+                if route is None:
+                    return False
+                event, response, payload = route
+                outer.last_client_ip = self.client_address[0]
+                event.set()
+                # Fixed response: skip per-request header formatting
+                self.wfile.write(response)
+                if is_verbose():
+                    debug(f"sent: {payload}")
+                success(f"Served {self.command} on {path}")
+                return True
+
+            def setup(self):
+                super().setup()
+                # Scratch buffer for draining request bodies; reused across keep-alive requests
+                self._req_buf = bytearray(2048)
+
+            def _drain_body(self, length: int):
+                """Read and discard the request body without allocating for small bodies."""
+                if length <= 0:
+                    return
+                if length <= len(self._req_buf):
+                    self.rfile.readinto(memoryview(self._req_buf)[:length])
+                else:
+                    self.rfile.read(length)
 
             def do_POST(self):  # noqa: N802 (stdlib signature)
                 length = int(self.headers.get("Content-Length", 0) or 0)
-                _ = self.rfile.read(length) if length > 0 else b""
+                self._drain_body(length)
 
                 debug(
                     f"Received PUT request on {self.path} from {self.client_address[0]}"
                 )
                 parsed_url = urlparse(self.path)
 
-                if parsed_url.path == "/life2/device/accessCloud.json":
-                    outer.last_client_ip = self.client_address[0]
-                    outer._hit_access_cloud.set()
-                    self._send_json(
-                        {
-                            "messageCode": "200",
-                            "info": "OK",
-                            "description": "正常",
-                            "success": True,
-                        }
-                    )
-                    success(f"Served POST on /life2/device/accessCloud.json")
+                if self._serve_route(parsed_url.path):
                     return
 
-
                 self.send_error(404, "Not Found")
 
             def do_GET(self):
                 debug(f"Received GET request on {self.path} from {self.client_address[0]}")
                 parsed_url = urlparse(self.path)
 
-                if parsed_url.path == "/jbalancer/new/bimqtt":
-                    outer.last_client_ip = self.client_address[0]
-                    outer._hit_bimqtt.set()
-                    self._send_json(
-                        {
-                            "protocal": "mqtt",
-                            "host": outer.mqtt_host,
-                            "port": outer.mqtt_port,
-                        }
-                    )
-                    success(f"Served GET on /jbalancer/new/bimqtt")
+                if self._serve_route(parsed_url.path):
                     return
 
                 if parsed_url.path == "/status":
+                    # ?wait=N long-polls: hold the reply until both endpoints are hit or N seconds pass
+                    try:
+                        wait = float(parse_qs(parsed_url.query).get("wait", ["0"])[0])
+                    except ValueError:
+                        wait = 0.0
+                    if wait > 0:
+                        outer.wait_until_both_endpoints_hit(min(wait, _STATUS_MAX_WAIT))
                     self._send_json(
                         {
                             "last_client_ip": outer.last_client_ip,
@@ -107,19 +179,17 @@ class SetupHTTPServer:
                     outer._hit_bimqtt.clear()
                     outer._hit_access_cloud.clear()
                     outer.last_client_ip = None
-                    self._send_json(
-                        {
-                            "reset": "success"
-                        }
-                    )
+                    self.wfile.write(_RESET_RESPONSE)
+                    if is_verbose():
+                        debug(f"sent: {_RESET_PAYLOAD}")
                     return
 
                 # Firmware download handler
                 # Security: Only allow .bin files from root directory to prevent path traversal
                 if parsed_url.path.endswith(".bin"):
-                    requested = os.path.basename(parsed_url.path)
+                    requested = parsed_url.path.lstrip("/")
                     # Only allow direct root requests, not any path structure
-                    if "/" in parsed_url.path.strip("/").replace(requested, ""):
+                    if "/" in requested or "\\" in requested:
                         warn(
                             f"Refused firmware download with path component: {parsed_url.path}"
                         )
@@ -132,23 +202,31 @@ class SetupHTTPServer:
                         )
                         self.send_error(400, "Invalid firmware filename")
                         return
-                    local_file = os.path.join(os.path.dirname(__file__), requested)
+                    # Resolve symlinks and make sure the file really lives in the firmware root
+                    local_file = os.path.realpath(os.path.join(_FW_ROOT, requested))
+                    if os.path.dirname(local_file) != _FW_ROOT:
+                        warn(f"Refused firmware download outside firmware root: {requested}")
+                        self.send_error(400, "Invalid firmware path")
+                        return
                     if not os.path.isfile(local_file):
                         warn(f"Firmware file not found: {requested}")
                         self.send_error(404, "Firmware file not found")
                         return
                     try:
                         with open(local_file, "rb") as fw:
-                            data = fw.read()
-                        self.send_response(200)
-                        self.send_header("Content-Type", "application/octet-stream")
-                        self.send_header(
-                            "Content-Disposition", f'attachment; filename="{requested}"'
-                        )
-                        self.send_header("Content-Length", str(len(data)))
-                        self.end_headers()
-                        self.wfile.write(data)
-                        success(f"Served firmware: {requested} ({len(data)} bytes)")
+                            size = os.fstat(fw.fileno()).st_size
+                            self.send_response(200)
+                            self.send_header("Content-Type", "application/octet-stream")
+                            self.send_header(
+                                "Content-Disposition", f'attachment; filename="{requested}"'
+                            )
+                            self.send_header("Content-Length", str(size))
+                            self.end_headers()
+                            self.wfile.flush()
+                            # Zero-copy via os.sendfile where available; the socket
+                            # falls back to chunked send() elsewhere (e.g. Windows)
+                            self.connection.sendfile(fw)
+                        success(f"Served firmware: {requested} ({size} bytes)")
                         outer.last_firmware_filename = requested
                         outer._firmware_served.set()
                     except Exception as e:
@@ -169,7 +247,36 @@ class SetupHTTPServer:
         try:
             # Avoid slow DNS reverse lookup in HTTPServer.server_bind on Windows
             # by skipping socket.getfqdn() for '0.0.0.0'.
-            class FastHTTPServer(HTTPServer):
+            # Threaded so a slow firmware download doesn't stall endpoint hits
+            # from other bulbs.
+            class FastHTTPServer(ThreadingHTTPServer):
+                def __init__(self, *args, **kwargs):
+                    # Accepted sockets still open, so server_close() can end keep-alive connections
+                    self._open_conns: set = set()
+                    self._conns_lock = threading.Lock()
+                    super().__init__(*args, **kwargs)
+
+                def process_request(self, request, client_address):
+                    with self._conns_lock:
+                        self._open_conns.add(request)
+                    super().process_request(request, client_address)
+
+                def shutdown_request(self, request):
+                    with self._conns_lock:
+                        self._open_conns.discard(request)
+                    super().shutdown_request(request)
+
+                def server_close(self):
+                    super().server_close()
+                    # Handler threads would otherwise keep answering on idle keep-alive sockets
+                    with self._conns_lock:
+                        conns = list(self._open_conns)
+                    for conn in conns:
+                        try:
+                            conn.shutdown(socket.SHUT_RDWR)
+                        except OSError:
+                            pass
+
                 def server_bind(self):
                     socketserver.TCPServer.server_bind(self)
                     host, port = self.server_address[:2]
@@ -200,13 +307,12 @@ class SetupHTTPServer:
         return True
 
     def wait_until_both_endpoints_hit(self, timeout_seconds: int = 120) -> bool:
-        start = time.time()
-        # Wait for both flags with overall timeout
-        while time.time() - start < timeout_seconds:
-            if self._hit_access_cloud.is_set() and self._hit_bimqtt.is_set():
-                return True
-            time.sleep(0.25)
-        return self._hit_access_cloud.is_set() and self._hit_bimqtt.is_set()
+        deadline = time.monotonic() + timeout_seconds
+        # Block on each flag in turn against one overall deadline instead of polling
+        for event in (self._hit_access_cloud, self._hit_bimqtt):
+            if not event.wait(max(0.0, deadline - time.monotonic())):
+                return False
+        return True
 
     def wait_for_firmware_download(self, timeout_seconds: int = 300) -> bool:
         return self._firmware_served.wait(timeout_seconds)
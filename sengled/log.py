@@ -38,6 +38,19 @@ class _LowercaseLevelFormatter(logging.Formatter):
 _logger = logging.getLogger("sengled")
 _logger.propagate = False
 
+# Current indentation in spaces (module global instead of a logger attribute)
+_INDENT = 0
+
+# Indent strings are reused instead of rebuilt on every log call
+_PAD = [" " * i for i in range(64)]
+
+
+def _prefix(extra_indent: int = 0) -> str:
+	n = _INDENT
+	if extra_indent and extra_indent > 0:
+		n += extra_indent
+	return _PAD[n] if n < len(_PAD) else " " * n
+
 
 _GL_SUB = "- "
 _GL_OK = "[✓] "
@@ -93,7 +106,8 @@ def configure(verbose: bool = False, compact_steps: bool = True, show_payloads:
 	# Store style flags (used by helpers below)
 	_logger.compact_steps = bool(compact_steps)           # type: ignore[attr-defined]
 	_logger.show_payloads = bool(show_payloads or verbose)  # type: ignore[attr-defined]
-	_logger.indent = 0  # type: ignore[attr-defined]
+	global _INDENT
+	_INDENT = 0
 	_logger.verbose = bool(verbose)  # type: ignore[attr-defined]
 
 	# Configure glyphs based on emoji support
@@ -115,39 +129,29 @@ def configure(verbose: bool = False, compact_steps: bool = True, show_payloads:
 
 # Thin UX helpers
 def say(msg: str, *, extra_indent: int = 0) -> None:
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{msg}")
 
 
 def step(title: str, *, extra_indent: int = 0) -> None:
 	# Alias to subsection for consistency
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_SUB}{title}")
 
 
 def info(msg: str, *, extra_indent: int = 0) -> None:
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	_logger.info(f"{prefix}{msg}")
 
 
 def warn(msg: str, *, extra_indent: int = 0) -> None:
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	_logger.warning(f"{prefix}{msg}")
 
 
 def warn_(msg: str, *, extra_indent: int = 0) -> None:
 	"""Warning messages with clear visual indicator"""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_WARN}{msg}")
 
 
@@ -157,32 +161,24 @@ def ok(msg: str, *, extra_indent: int = 0) -> None:
 
 
 def debug(msg: str, *, extra_indent: int = 0) -> None:
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	_logger.debug(f"{prefix}{msg}")
 
 
 def error(msg: str, *, extra_indent: int = 0) -> None:
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	_logger.error(f"{prefix}{msg}")
 
 
 def send(proto: str, payload: str, *, extra_indent: int = 0) -> None:
 	if getattr(_logger, "show_payloads", False):
-		base = int(getattr(_logger, "indent", 0))
-		add = max(0, int(extra_indent or 0))
-		prefix = " " * (base + add)
+		prefix = _prefix(extra_indent)
 		print(f"{prefix}>> {proto} send: {payload}")
 
 
 def recv(proto: str, payload: str, *, extra_indent: int = 0) -> None:
 	if getattr(_logger, "show_payloads", False):
-		base = int(getattr(_logger, "indent", 0))
-		add = max(0, int(extra_indent or 0))
-		prefix = " " * (base + add)
+		prefix = _prefix(extra_indent)
 		print(f"{prefix}<< {proto} recv: {payload}")
 
 
@@ -193,89 +189,74 @@ def section(title: str) -> None:
 	# Center title within the bar width
 	print(" " + title.center(58))
 	print(f"{bar}")
-	_logger.indent = 0  # type: ignore[attr-defined]
+	global _INDENT
+	_INDENT = 0
 
 
 def subsection(title: str, *, extra_indent: int = 0) -> None:
 	"""Subsection with subtle separation"""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_SUB}{title}")
-	_logger.indent = 2  # type: ignore[attr-defined]
+	global _INDENT
+	_INDENT = 2
 
 
 def success(msg: str, *, extra_indent: int = 0) -> None:
 	"""Success messages with clear visual indicator"""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_OK}{msg}")
 
 
 def highlight(msg: str, *, extra_indent: int = 0) -> None:
 	"""Highlight important messages with clear visual emphasis"""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_HIGHLIGHT}{msg}")
 
 
 def waiting(msg: str, *, extra_indent: int = 0) -> None:
 	"""Waiting/status messages"""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_WAIT}{msg}")
 
 
 def result(msg: str, *, extra_indent: int = 0) -> None:
 	"""Result/outcome messages"""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_RESULT}{msg}")
 
 
 def stop(msg: str, *, extra_indent: int = 0) -> None:
 	"""Stop/blocked messages with clear visual indicator"""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_STOP}{msg}")
 
 
 def cmd(msg: str, *, extra_indent: int = 0) -> None:
 	"""Command hint lines with arrow prefix."""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_CMD}{msg}")
 
 
 def rule(width: int = 16, *, extra_indent: int = 0) -> None:
 	"""Print a horizontal rule honoring current indent."""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{'─'*max(1, width)}")
 
 
 def set_indent(spaces: int) -> None:
 	"""Set current indentation (non-negative)."""
-	_logger.indent = max(0, int(spaces))  # type: ignore[attr-defined]
+	global _INDENT
+	_INDENT = max(0, int(spaces))
 
 
 def get_indent() -> int:
 	"""Return current indentation in spaces."""
-	return int(getattr(_logger, "indent", 0))
+	return _INDENT
 
 
 def firmware_warn(msg: str, *, extra_indent: int = 0) -> None:
 	"""Firmware-specific warning messages with danger indicator"""
-	base = int(getattr(_logger, "indent", 0))
-	add = max(0, int(extra_indent or 0))
-	prefix = " " * (base + add)
+	prefix = _prefix(extra_indent)
 	print(f"{prefix}{_GL_DANGER}{msg}")
 
 
@@ -2,14 +2,16 @@ import asyncio
 import ssl
 import threading
 import logging
+from concurrent.futures import Future
 from ipaddress import ip_address
 from sengled.log import info, success, debug, waiting, warn
 from pathlib import Path
+from cryptography.exceptions import UnsupportedAlgorithm
 from cryptography import x509
 from cryptography.x509.oid import NameOID
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from datetime import datetime, timedelta
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from amqtt.broker import Broker
@@ -19,27 +21,27 @@ from sengled.utils import get_local_ip
 from sengled.constants import DEFAULT_BROKER_PORT as BROKER_TLS_PORT
 
 
-def generate_certificates(cert_dir: Path, force_regenerate: bool = False):
-    """Generate CA and server certificates if they don't exist or if forced."""
-    cert_dir.mkdir(parents=True, exist_ok=True)
-    
-    ca_key_path = cert_dir / "ca.key"
-    ca_cert_path = cert_dir / "ca.crt"
-    server_key_path = cert_dir / "server.key"
-    server_cert_path = cert_dir / "server.crt"
-    
-    # Check if all files exist
-    if not force_regenerate and all(p.exists() for p in [ca_key_path, ca_cert_path, server_key_path, server_cert_path]):
-        debug("Certificates already exist, skipping generation")
-        return ca_cert_path, server_cert_path, server_key_path
-    
-    waiting("Generating TLS certificates (this may take a few seconds)...")
-    
-    # Generate CA private key
-    ca_private_key = rsa.generate_private_key(
+def _generate_private_key(ec_keys: bool = False):
+    """RSA-2048 by default; ECDSA P-256 generates in milliseconds but needs bulb support."""
+    if ec_keys:
+        return ec.generate_private_key(ec.SECP256R1())
+    return rsa.generate_private_key(
         public_exponent=65537,
         key_size=2048,
     )
+
+
+def _validity_window():
+    """Return naive-UTC (not_before, not_after) for a 10-year certificate."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now, now + timedelta(days=3650)
+
+
+def _generate_ca(ec_keys: bool = False, validity=None):
+    """Create a new self-signed CA. Returns (private_key, certificate)."""
+    not_before, not_after = validity or _validity_window()
+    # Generate CA private key
+    ca_private_key = _generate_private_key(ec_keys)
     
     # Generate CA certificate
     ca_subject = x509.Name([
@@ -55,9 +57,9 @@ def generate_certificates(cert_dir: Path, force_regenerate: bool = False):
     ).serial_number(
         x509.random_serial_number()
     ).not_valid_before(
-        datetime.utcnow()
+        not_before
     ).not_valid_after(
-        datetime.utcnow() + timedelta(days=3650)
+        not_after
     ).add_extension(
         x509.BasicConstraints(ca=True, path_length=None), critical=True
     ).add_extension(
@@ -65,12 +67,58 @@ def generate_certificates(cert_dir: Path, force_regenerate: bool = False):
     ).add_extension(
         x509.AuthorityKeyIdentifier.from_issuer_public_key(ca_private_key.public_key()), critical=False
     ).sign(ca_private_key, hashes.SHA256())
+
+    return ca_private_key, ca_cert
+
+
+def _emit(notes: Optional[list], log, message: str):
+    """Log now, or queue (log, message) for the main thread when notes is given."""
+    if notes is None:
+        log(message)
+    else:
+        notes.append((log, message))
+
+
+def generate_certificates(cert_dir: Path, force_regenerate: bool = False, ec_keys: bool = False,
+                          notes: Optional[list] = None):
+    """Generate CA and server certificates if they don't exist or if forced.
+
+    ec_keys=True uses ECDSA P-256 keys instead of RSA-2048. With a notes list,
+    nothing is printed; log lines are appended to it for the caller to replay.
+    """
+    cert_dir.mkdir(parents=True, exist_ok=True)
+    
+    ca_key_path = cert_dir / "ca.key"
+    ca_cert_path = cert_dir / "ca.crt"
+    server_key_path = cert_dir / "server.key"
+    server_cert_path = cert_dir / "server.crt"
+    
+    # Check if all files exist
+    if not force_regenerate and all(p.exists() for p in [ca_key_path, ca_cert_path, server_key_path, server_cert_path]):
+        _emit(notes, debug, "Certificates already exist, skipping generation")
+        return ca_cert_path, server_cert_path, server_key_path
+    
+    if notes is None:
+        waiting("Generating TLS certificates (this may take a few seconds)...")
+    validity = _validity_window()
+    not_before, not_after = validity
+    
+    # Only the server pair is missing: keep the existing CA and skip one RSA keygen
+    new_ca = True
+    if not force_regenerate and ca_key_path.exists() and ca_cert_path.exists():
+        try:
+            ca_private_key = serialization.load_pem_private_key(ca_key_path.read_bytes(), password=None)
+            ca_cert = x509.load_pem_x509_certificate(ca_cert_path.read_bytes())
+            new_ca = False
+            _emit(notes, debug, "Reusing existing CA certificate")
+        except (ValueError, TypeError, UnsupportedAlgorithm) as e:
+            _emit(notes, warn, f"Existing CA could not be loaded ({e}); generating a new one")
+    if new_ca:
+        ca_private_key, ca_cert = _generate_ca(ec_keys, validity)
+    ca_subject = ca_cert.subject
     
     # Generate server private key
-    server_private_key = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=2048,
-    )
+    server_private_key = _generate_private_key(ec_keys)
     
     # Generate server certificate
     server_subject = x509.Name([
@@ -86,9 +134,9 @@ def generate_certificates(cert_dir: Path, force_regenerate: bool = False):
     ).serial_number(
         x509.random_serial_number()
     ).not_valid_before(
-        datetime.utcnow()
+        not_before
     ).not_valid_after(
-        datetime.utcnow() + timedelta(days=3650)
+        not_after
     ).add_extension(
         x509.BasicConstraints(ca=False, path_length=None), critical=True
     ).add_extension(
@@ -121,15 +169,16 @@ def generate_certificates(cert_dir: Path, force_regenerate: bool = False):
     ).sign(ca_private_key, hashes.SHA256())
     
     # Write files
-    with open(ca_key_path, "wb") as f:
-        f.write(ca_private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        ))
-    
-    with open(ca_cert_path, "wb") as f:
-        f.write(ca_cert.public_bytes(serialization.Encoding.PEM))
+    if new_ca:
+        with open(ca_key_path, "wb") as f:
+            f.write(ca_private_key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            ))
+        
+        with open(ca_cert_path, "wb") as f:
+            f.write(ca_cert.public_bytes(serialization.Encoding.PEM))
     
     with open(server_key_path, "wb") as f:
         f.write(server_private_key.private_bytes(
@@ -141,10 +190,58 @@ def generate_certificates(cert_dir: Path, force_regenerate: bool = False):
     with open(server_cert_path, "wb") as f:
         f.write(server_cert.public_bytes(serialization.Encoding.PEM))
     
-    success(f"Generated certificates in {cert_dir}")
+    _emit(notes, success, f"Generated certificates in {cert_dir}")
     return ca_cert_path, server_cert_path, server_key_path
 
 
+# RSA key generation takes seconds on slow machines, so it runs on a worker thread
+# while the caller does other work (UDP handshake, prompts, HTTP server start).
+# The worker is a daemon and prints nothing: Ctrl+C at a prompt exits at once,
+# and its log lines are replayed by whoever waits on the future.
+_cert_futures: dict[tuple, Future] = {}
+_cert_futures_lock = threading.Lock()
+# One generation at a time, so a forced run and a prefetch never write the same files
+_cert_write_lock = threading.Lock()
+
+
+def _generate_in_background(cert_dir: Path, force_regenerate: bool, ec_keys: bool) -> Future:
+    """Run generate_certificates() on a daemon thread; the future yields (paths, notes)."""
+    future: Future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            notes: list = []
+            with _cert_write_lock:
+                paths = generate_certificates(cert_dir, force_regenerate, ec_keys, notes=notes)
+            future.set_result((paths, notes))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="sengled-certs", daemon=True).start()
+    return future
+
+
+def prefetch_certificates(cert_dir: Path, force_regenerate: bool = False, ec_keys: bool = False) -> Future:
+    """Start generate_certificates() in the background and return its future.
+
+    The future yields (paths, notes); see generate_certificates() for notes.
+    Unforced requests for the same directory share one future, so calling this
+    early and constructing an EmbeddedBroker later generates the files only once.
+    """
+    if force_regenerate:
+        return _generate_in_background(cert_dir, True, ec_keys)
+
+    key = (Path(cert_dir), ec_keys)
+    with _cert_futures_lock:
+        future = _cert_futures.get(key)
+        if future is None or (future.done() and future.exception() is not None):
+            future = _generate_in_background(cert_dir, False, ec_keys)
+            _cert_futures[key] = future
+        return future
+
+
 # Monkey-patch to disable client-cert requests
 # The amqtt library by default requires client certificates, but Sengled bulbs
 # don't provide them. This patch creates a more permissive SSL context.
@@ -153,7 +250,8 @@ def _no_client_auth_create_ssl_context(self, listener):
     ctx.load_cert_chain(listener["certfile"], listener["keyfile"])
     ctx.verify_mode = ssl.CERT_NONE
     try:
-        ctx.set_ciphers("ECDHE-RSA-AES256-GCM-SHA384")
+        # Offer the ECDSA suite too so EC certificates from --ec-certs still handshake
+        ctx.set_ciphers("ECDHE-ECDSA-AES256-GCM-SHA384:ECDHE-RSA-AES256-GCM-SHA384")
     except Exception:
         pass
     try:
@@ -166,9 +264,11 @@ Broker._create_ssl_context = _no_client_auth_create_ssl_context
 
 
 class EmbeddedBroker:
-    def __init__(self, cert_dir: Path, force_regenerate: bool = False, verbose: bool = False):
+    def __init__(self, cert_dir: Path, force_regenerate: bool = False, verbose: bool = False,
+                 ec_keys: bool = False):
         self.cert_dir = cert_dir
         self.force_regenerate = force_regenerate
+        self.ec_keys = ec_keys
         self.verbose = verbose
         self.config = None
         self._broker = None
@@ -178,15 +278,20 @@ class EmbeddedBroker:
         self.is_running = threading.Event()
         self.thread = threading.Thread(target=self._run, daemon=True)
 
-        self._prepare_certs()
-        self._build_config()
+        # Certificates are generated in the background; start() waits for them
+        self._cert_future = prefetch_certificates(
+            self.cert_dir, force_regenerate=self.force_regenerate, ec_keys=self.ec_keys
+        )
         self._configure_logging()
 
     def _prepare_certs(self):
-        """Generate or validate certificate files for the broker."""
-        self.ca_file, self.cert_file, self.key_file = generate_certificates(
-            self.cert_dir, force_regenerate=self.force_regenerate
-        )
+        """Wait for the certificate files generated or validated in the background."""
+        if not self._cert_future.done():
+            waiting("Generating TLS certificates (this may take a few seconds)...")
+        (self.ca_file, self.cert_file, self.key_file), notes = self._cert_future.result()
+        # The worker stays silent so it can't interleave with prompts; log here instead
+        for log, message in notes:
+            log(message)
 
     def _build_config(self):
         listener_config = {
@@ -255,6 +360,8 @@ class EmbeddedBroker:
             self.is_running.clear()
 
     def start(self):
+        self._prepare_certs()
+        self._build_config()
         waiting("Starting MQTT broker...")
         self.thread.start()
         started = self.started.wait(timeout=10)
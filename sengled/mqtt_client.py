@@ -1,31 +1,54 @@
 import paho.mqtt.client as mqtt
+from collections import deque
+from functools import lru_cache
+from ipaddress import ip_address
 from typing import Optional
-import time
+import asyncio
+import socket
 import ssl
 import threading
 import json
 
-from sengled.log import success, warn, debug
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from sengled.log import success, warn, debug, is_verbose
 from pathlib import Path
 
+# Oldest messages are dropped past this so a publish storm can't grow memory unbounded
+MAX_BUFFERED_MESSAGES = 1000
+
+
+def _json_dumps(obj) -> str:
+    """Encode obj as compact JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    # ensure_ascii=False matches orjson: non-ASCII goes out as raw UTF-8, not \uXXXX escapes
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
 
-def send_update_command(client: "MQTTClient", mac_address: str, command_list: list):
+
+def send_update_command(client: "MQTTClient", mac_address: str, command_list: list, qos: int = 0):
     """
     Sends a command to the bulb's update topic using a "fire-and-forget" approach.
+
+    QoS 0 returns as soon as the message is written to the socket; pass qos=1
+    when the broker must confirm delivery (e.g. the firmware upgrade command).
     """
     update_topic = f"wifielement/{mac_address}/update"
-    payload = json.dumps(command_list)
+    payload = _json_dumps(command_list)
 
     debug(f"Topic: {update_topic}")
     debug(f"Payload: {payload}")
 
-    # Just publish the command. Do not subscribe or wait.
-    publish_success = client.publish(update_topic, payload, qos=1)
+    # Just publish the command. Do not subscribe or wait for a reply; publish_sync
+    # only blocks until the write (QoS 0) or PUBACK (QoS 1) so a following
+    # disconnect can't drop it
+    publish_success = client.publish_sync(update_topic, payload, qos=qos)
 
     if publish_success:
         success("Command sent successfully")
-        # Brief pause to ensure the message is sent before the script potentially exits
-        time.sleep(0.5)
         return payload
     else:
         warn("Failed to send command")
@@ -34,8 +57,27 @@ def send_update_command(client: "MQTTClient", mac_address: str, command_list: li
 
 def publish_topic(client: "MQTTClient", topic: str, payload, qos: int = 1, json_encode: bool = False) -> bool:
     """Publish to any topic, optionally JSON-encoding payload."""
-    body = json.dumps(payload) if json_encode and not isinstance(payload, str) else payload
-    return bool(client.publish(topic, body, qos=qos))
+    body = _json_dumps(payload) if json_encode and not isinstance(payload, str) else payload
+    return bool(client.publish_sync(topic, body, qos=qos))
+
+
+@lru_cache(maxsize=4)
+def _get_tls_context(ca_certs: str | None, certfile: str | None, keyfile: str | None) -> ssl.SSLContext:
+    """Build (once per cert set) the TLS context that tls_set() would have created.
+
+    Loading the CA bundle and client key pair is the expensive part of TLS setup,
+    so every client using the same certificates shares a single context.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS)
+    if certfile is not None:
+        context.load_cert_chain(certfile, keyfile)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_REQUIRED if ca_certs else ssl.CERT_NONE
+    if ca_certs is not None:
+        context.load_verify_locations(ca_certs)
+    else:
+        context.load_default_certs()
+    return context
 
 
 class MQTTClient:
@@ -53,16 +95,23 @@ class MQTTClient:
         import uuid
         client_id = f"sengled_client_{str(uuid.uuid4())[:8]}"
         self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, client_id=client_id)
-        self.received_messages = []
+        self.received_messages: deque[dict] = deque(maxlen=MAX_BUFFERED_MESSAGES)
         self.client.on_message = self._on_message
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
         self.client.on_log = self._on_log
         self._connected_event = threading.Event()
         self._connect_rc = None  # Store result code for inspection
+        # Mirrors paho's connection state without taking its lock on every call
+        self._connected = False
+        # paho refuses a second tls_set_context(); keep the first one so connect() can be retried
+        self._tls_configured = False
+        # IPv4 address for self.broker, resolved on first connect
+        self._broker_addr: str | None = None
 
     def _on_connect(self, client, userdata, flags, rc):
         self._connect_rc = rc
+        self._connected = rc == 0
         if rc == 0:
             try:
                 info("")
@@ -78,19 +127,23 @@ class MQTTClient:
 
     def _on_message(self, client, userdata, msg):
         """Callback when message is received"""
+        # Keep the raw bytes here; get_message() decodes only what is actually consumed
         message = {
             'topic': msg.topic,
-            'payload': msg.payload.decode('utf-8'),
+            'payload': msg.payload,
             'qos': msg.qos,
             'retain': msg.retain
         }
         self.received_messages.append(message)
-        try:
-            debug(f"Received message on {msg.topic}: {msg.payload.decode('utf-8')}")
-        except Exception:
-            pass
+        # Skip building the log line on paho's network thread unless it will be shown
+        if is_verbose():
+            try:
+                debug(f"Received message on {msg.topic}: {msg.payload.decode('utf-8', 'replace')}")
+            except Exception:
+                pass
 
     def _on_disconnect(self, client, userdata, rc):
+        self._connected = False
         try:
             debug(f"MQTT client disconnected with return code: {rc}")
         except Exception:
@@ -102,50 +155,49 @@ class MQTTClient:
         except Exception:
             pass
 
+    def _resolve_broker(self) -> str:
+        """Resolve the broker host once, preferring IPv4, so reconnects skip DNS.
+
+        Falls back to the hostname (letting paho resolve it) if there is no A record.
+        """
+        if self._broker_addr is None:
+            try:
+                ip_address(self.broker)
+                self._broker_addr = self.broker
+            except ValueError:
+                try:
+                    infos = socket.getaddrinfo(self.broker, self.port, socket.AF_INET, socket.SOCK_STREAM)
+                    self._broker_addr = infos[0][4][0]
+                    debug(f"Resolved MQTT broker {self.broker} to {self._broker_addr}")
+                except socket.gaierror:
+                    return self.broker
+        return self._broker_addr
+
     def connect(self, timeout: float = 10.0) -> bool:
         """Connects to the MQTT broker and waits until connection is established or fails."""
         try:
             self._connected_event.clear()
-            if self.use_tls:
+            if self.use_tls and not self._tls_configured:
                 # Only pass certfile/keyfile if both are provided
                 if self.certfile and self.keyfile:
                     try:
-                        debug(f"Setting up TLS with client certificates")
-                        debug(f"ca_certs: {self.ca_certs}")
-                        debug(f"certfile: {self.certfile}")
-                        debug(f"keyfile: {self.keyfile}")
-                        
-                        # Check if files actually exist and are readable
-                        import os
-                        if self.certfile and os.path.exists(self.certfile):
-                            debug(f"Certfile exists and size: {os.path.getsize(self.certfile)} bytes")
-                        else:
-                            debug(f"Certfile issue: exists={os.path.exists(self.certfile) if self.certfile else 'None'}")
-                            
-                        if self.keyfile and os.path.exists(self.keyfile):
-                            debug(f"Keyfile exists and size: {os.path.getsize(self.keyfile)} bytes")
-                        else:
-                            debug(f"Keyfile issue: exists={os.path.exists(self.keyfile) if self.keyfile else 'None'}")
-                        
-                        debug(f"About to call tls_set with:")
-                        debug(f"  ca_certs={self.ca_certs}")
-                        debug(f"  certfile={self.certfile}")
-                        debug(f"  keyfile={self.keyfile}")
-                        debug(f"  cert_reqs=ssl.CERT_NONE")
-                        debug(f"  tls_version=ssl.PROTOCOL_TLSv1_2")
-                        
+                        # Only pay for the path checks and formatting when the output is shown
+                        if is_verbose():
+                            import os
+                            debug("Setting up TLS with client certificates")
+                            debug(f"ca_certs={self.ca_certs} certfile={self.certfile} keyfile={self.keyfile}")
+                            for label, path in (("Certfile", self.certfile), ("Keyfile", self.keyfile)):
+                                if os.path.exists(path):
+                                    debug(f"{label} exists and size: {os.path.getsize(path)} bytes")
+                                else:
+                                    debug(f"{label} issue: exists=False")
+
                         # Configure TLS to match amqtt broker expectations
                         # amqtt documentation shows it needs proper CA verification
-                        self.client.tls_set(
-                            ca_certs=self.ca_certs,
-                            certfile=self.certfile,
-                            keyfile=self.keyfile,
-                            cert_reqs=ssl.CERT_REQUIRED if self.ca_certs else ssl.CERT_NONE,
-                            tls_version=ssl.PROTOCOL_TLS
+                        self.client.tls_set_context(
+                            _get_tls_context(self.ca_certs, self.certfile, self.keyfile)
                         )
                         debug("TLS setup completed successfully")
-                        debug(f"Client TLS context: {self.client._ssl_context}")
-                        debug(f"About to connect to {self.broker}:{self.port}")
                     except Exception as e:
                         debug(f"TLS setup with client certs failed: {e}")
                         raise
@@ -153,19 +205,15 @@ class MQTTClient:
                     try:
                         debug("Setting up TLS without client certificates")
                         # Try most permissive TLS settings for amqtt compatibility
-                        self.client.tls_set(
-                            ca_certs=None,  # Don't verify server cert
-                            certfile=None,
-                            keyfile=None,
-                            cert_reqs=ssl.CERT_NONE,
-                            tls_version=ssl.PROTOCOL_TLS
-                        )
+                        # Don't verify server cert
+                        self.client.tls_set_context(_get_tls_context(None, None, None))
                     except Exception as e:
                         debug(f"TLS setup without client certs failed: {e}")
                         raise
                 self.client.tls_insecure_set(True)
+                self._tls_configured = True
             debug(f"Attempting MQTT connect to {self.broker}:{self.port}")
-            self.client.connect(self.broker, self.port, self.keepalive)
+            self.client.connect(self._resolve_broker(), self.port, self.keepalive)
             self.client.loop_start()
             debug("MQTT client loop started, waiting for connection...")
             connected = self._connected_event.wait(timeout)
@@ -181,7 +229,7 @@ class MQTTClient:
 
     def subscribe(self, topic: str, qos: int = 0) -> bool:
         """Subscribes to a topic."""
-        if not self.client.is_connected():
+        if not self._connected:
             warn("MQTT client is not connected.")
             return False
         
@@ -194,14 +242,48 @@ class MQTTClient:
             return False
 
     def publish(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> bool:
-        """Publishes a message to a given topic."""
-        if not self.client.is_connected():
+        """Queues a message for publishing without waiting for delivery.
+
+        Returns True once paho accepted the message. Callers that disconnect
+        right afterwards should use publish_sync() so the message isn't dropped.
+        """
+        if not self._connected:
             warn("MQTT client is not connected.")
             return False
-        
+
         result = self.client.publish(topic, payload, qos, retain)
-        result.wait_for_publish(timeout=5)
-        
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            return True
+        warn(f"Failed to publish message to topic: {topic}")
+        return False
+
+    def publish_sync(self, topic: str, payload: str, qos: int = 0, retain: bool = False,
+                     timeout: float = 5.0) -> bool:
+        """Publishes a message and blocks until it is sent (QoS 0) or acknowledged (QoS 1/2)."""
+        if not self._connected:
+            warn("MQTT client is not connected.")
+            return False
+
+        result = self.client.publish(topic, payload, qos, retain)
+        result.wait_for_publish(timeout=timeout)
+
+        if result.is_published():
+            return True
+        else:
+            warn(f"Failed to publish message to topic: {topic}")
+            return False
+
+    async def publish_async(self, topic: str, payload: str, qos: int = 0, retain: bool = False,
+                            timeout: float = 5.0) -> bool:
+        """Like publish_sync(), but waits for delivery in an executor instead of blocking the event loop."""
+        if not self._connected:
+            warn("MQTT client is not connected.")
+            return False
+
+        result = self.client.publish(topic, payload, qos, retain)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, result.wait_for_publish, timeout)
+
         if result.is_published():
             return True
         else:
@@ -210,13 +292,18 @@ class MQTTClient:
 
     def has_message(self) -> bool:
         """Check if any messages have been received."""
-        return len(self.received_messages) > 0
+        return bool(self.received_messages)
 
     def get_message(self) -> Optional[dict]:
         """Get the next received message."""
-        if self.received_messages:
-            return self.received_messages.pop(0)
-        return None
+        # deque.popleft() is atomic, so no check-then-pop race with clear_messages()
+        try:
+            message = self.received_messages.popleft()
+        except IndexError:
+            return None
+        if isinstance(message['payload'], bytes):
+            message['payload'] = message['payload'].decode('utf-8')
+        return message
 
     def clear_messages(self):
         """Clear all received messages."""
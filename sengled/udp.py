@@ -1,5 +1,8 @@
+import atexit
 import json
+import select
 import socket
+import threading
 import time
 from typing import Optional
 
@@ -7,97 +10,157 @@ from sengled.log import send, recv, info, warn, success, waiting, set_indent
 from sengled.constants import BULB_IP, BULB_PORT
 
 
-def send_udp_command(bulb_ip: str, payload_dict: dict, timeout: int = 3) -> Optional[dict]:
+# One UDP socket per thread, reused across send_udp_command() calls
+_udp_local = threading.local()
+
+
+def _get_udp_socket(timeout: float) -> socket.socket:
+    """Return this thread's UDP socket, creating it and applying timeout as needed."""
+    s = getattr(_udp_local, "sock", None)
+    if s is None:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _udp_local.sock = s
+        _udp_local.timeout = None
+    if _udp_local.timeout != timeout:
+        s.settimeout(timeout)
+        _udp_local.timeout = timeout
+    return s
+
+
+def _drain_udp_socket(s: socket.socket) -> None:
+    """Discard late replies to earlier timed-out commands so they aren't read as the next answer.
+
+    A stale error from an earlier datagram (Windows reports ICMP port-unreachable
+    as ConnectionResetError on recvfrom) is discarded too, so it can't cancel the
+    send that follows. The pass is bounded in case the socket keeps erroring.
+    """
+    for _ in range(64):
+        if not select.select([s], [], [], 0)[0]:
+            return
+        try:
+            s.recvfrom(4096)
+        except OSError:
+            continue
+
+
+def close_udp_socket() -> None:
+    """Close the calling thread's cached UDP socket, if any."""
+    s = getattr(_udp_local, "sock", None)
+    if s is not None:
+        _udp_local.sock = None
+        s.close()
+
+
+atexit.register(close_udp_socket)
+
+
+def send_udp_command(bulb_ip: str, payload_dict: dict, timeout: float = 3) -> Optional[dict]:
     """Send a UDP command to the bulb using the simple JSON protocol.
 
     Returns the parsed JSON response dict, or None on failure.
     """
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.settimeout(timeout)
+    return send_udp_command_raw(bulb_ip, json.dumps(payload_dict).encode("utf-8"), timeout)
 
-            json_payload = json.dumps(payload_dict)
-            encoded_payload = json_payload.encode("utf-8")
 
-            send("UDP", json_payload)
-            s.sendto(encoded_payload, (bulb_ip, BULB_PORT))
+def send_udp_command_raw(bulb_ip: str, encoded_payload: bytes, timeout: float = 3) -> Optional[dict]:
+    """Like send_udp_command(), but for a payload that is already JSON-encoded."""
+    try:
+        s = _get_udp_socket(timeout)
+        _drain_udp_socket(s)
+
+        send("UDP", encoded_payload.decode("utf-8"))
+        s.sendto(encoded_payload, (bulb_ip, BULB_PORT))
 
+        try:
+            data, _ = s.recvfrom(4096)
+            response_str = data.decode("utf-8")
+            recv("UDP", response_str)
             try:
-                data, _ = s.recvfrom(4096)
-                response_str = data.decode("utf-8")
-                recv("UDP", response_str)
-                try:
-                    return json.loads(response_str)
-                except json.JSONDecodeError:
-                    warn(f"Could not parse response as JSON: {response_str}")
-                    return None
-            except socket.timeout:
+                return json.loads(response_str)
+            except json.JSONDecodeError:
+                warn(f"Could not parse response as JSON: {response_str}")
                 return None
+        except socket.timeout:
+            return None
     except Exception as e:
+        # Start over with a fresh socket next time
+        close_udp_socket()
         warn(f"Error sending UDP command: {e}")
         return None
 
 
+# Per-attempt reply timeout for the toggle test: starts short and doubles up to the cap
+_UDP_INITIAL_TIMEOUT = 0.3
+_UDP_MAX_TIMEOUT = 3.0
+# Pause before re-running the OFF/ON sequence after the bulb rejected a command
+_UDP_RETRY_BACKOFF = 0.1
+
+# Toggle-test payloads, encoded once so retries do no JSON work
+_PROBE_BYTES = json.dumps({"func": "get_device_brightness", "param": {}}).encode("utf-8")
+_OFF_BYTES = json.dumps({"func": "set_device_switch", "param": {"switch": 0}}).encode("utf-8")
+_ON_BYTES = json.dumps({"func": "set_device_switch", "param": {"switch": 1}}).encode("utf-8")
+
+
+def _send_with_backoff(bulb_ip: str, encoded_payload: bytes, deadline: float) -> Optional[dict]:
+    """Resend payload with a doubling reply timeout until the bulb answers or the deadline passes."""
+    timeout = _UDP_INITIAL_TIMEOUT
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        response = send_udp_command_raw(bulb_ip, encoded_payload, timeout=min(timeout, remaining))
+        if response is not None:
+            return response
+        timeout = min(timeout * 2, _UDP_MAX_TIMEOUT)
+
+
 def udp_toggle_until_success(bulb_ip: str, max_wait_seconds: int = 60) -> bool:
     """Test UDP control by turning OFF, then ON. Retries up to 3 times. Returns True on success."""
     set_indent(0)
-    waiting("Proceeding to UDP control test in 5 seconds...")
-    time.sleep(5)
+    deadline = time.monotonic() + max_wait_seconds
+
+    # The bulb may still be joining the network: poll it with a read-only query
+    # (for at most 5 s) instead of always sleeping
+    waiting("Waiting for the bulb to answer UDP...")
+    _send_with_backoff(bulb_ip, _PROBE_BYTES, min(deadline, time.monotonic() + 5))
 
     attempts = 3
     for attempt in range(1, attempts + 1):
+        if attempt > 1:
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(_UDP_RETRY_BACKOFF * 2 ** (attempt - 2))
+
         info("Testing power OFF command...", extra_indent=2)
-        off_payload = {"func": "set_device_switch", "param": {"switch": 0}}
-        off_response = send_udp_command(bulb_ip, off_payload)
+        off_response = _send_with_backoff(bulb_ip, _OFF_BYTES, deadline)
         if not off_response or not isinstance(off_response, dict):
             warn("OFF command failed - no response")
-            if attempt < attempts:
-                time.sleep(1)
-                continue
-            set_indent(0)
-            return False
+            continue
         off_result = off_response.get("result", {})
         # Bulb protocol: ret=0 means success, any other value indicates failure
         # The result object contains additional status information from the bulb
         if not isinstance(off_result, dict) or off_result.get("ret") != 0:
             warn("OFF command failed - bulb rejected")
-            if attempt < attempts:
-                time.sleep(1)
-                continue
-            set_indent(0)
-            return False
+            continue
         success("Power OFF command succeeded", extra_indent=4)
 
-        time.sleep(1)
-
+        # The OFF reply already confirms ordering, so ON can follow immediately
         info("Testing power ON command...", extra_indent=2)
-        on_payload = {"func": "set_device_switch", "param": {"switch": 1}}
-        on_response = send_udp_command(bulb_ip, on_payload)
+        on_response = _send_with_backoff(bulb_ip, _ON_BYTES, deadline)
         if not on_response or not isinstance(on_response, dict):
             warn("ON command failed - no response")
-            if attempt < attempts:
-                time.sleep(1)
-                continue
-            set_indent(0)
-            return False
+            continue
         on_result = on_response.get("result", {})
         # Bulb protocol: ret=0 means success, any other value indicates failure
         # The result object contains additional status information from the bulb
         if not isinstance(on_result, dict) or on_result.get("ret") != 0:
             warn("ON command failed - bulb rejected")
-            if attempt < attempts:
-                time.sleep(1)
-                continue
-            set_indent(0)
-            return False
+            continue
         success("Power ON command succeeded", extra_indent=4)
 
         success("UDP control test passed")
         set_indent(0)
         return True
 
-    # If we somehow fall through the loop without returning True
     set_indent(0)
     return False
-
-
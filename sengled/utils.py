@@ -1,20 +1,45 @@
 import json
+import os
 import socket
+import sys
 import time
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Optional
 
-def get_local_ip() -> str:
-    """Get the local IP address of this computer."""
+# get_local_ip() is called several times per command; reuse the answer briefly.
+# Kept short because the wizard moves this PC between the bulb AP and the LAN.
+_LOCAL_IP_TTL = 5.0
+_local_ip_cache: Optional[tuple[float, str]] = None
+
+# Parsed bulbs.json keyed on (path, st_mtime_ns); reloaded only when the file changes
+_bulbs_cache: Optional[tuple[Path, int, Dict[str, Dict]]] = None
+
+_SIOCGIFHWADDR = 0x8927  # Linux ioctl: get an interface's hardware address
+
+_MAC_SEP_RE = re.compile(r"[:-]")
+_MAC_HEX_RE = re.compile(r"[0-9A-F]{12}")
+
+def get_local_ip(refresh: bool = False) -> str:
+    """Get the local IP address of this computer.
+
+    The result is cached for a few seconds; pass refresh=True right after
+    the network may have changed (e.g. joining or leaving the bulb AP).
+    """
+    global _local_ip_cache
+    now = time.monotonic()
+    if not refresh and _local_ip_cache and now - _local_ip_cache[0] < _LOCAL_IP_TTL:
+        return _local_ip_cache[1]
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
         local_ip = s.getsockname()[0]
         s.close()
-        return local_ip
     except OSError:
-        return "127.0.0.1"
+        local_ip = "127.0.0.1"
+    _local_ip_cache = (now, local_ip)
+    return local_ip
 
 def get_mac_address(ip: Optional[str] = None, interface: Optional[str] = None) -> Optional[str]:
     """Get MAC address using psutil (cross-platform, more reliable than getmac).
@@ -26,6 +51,18 @@ def get_mac_address(ip: Optional[str] = None, interface: Optional[str] = None) -
     Returns:
         MAC address string or None if not found
     """
+    if interface and sys.platform.startswith("linux"):
+        # One SIOCGIFHWADDR ioctl instead of importing psutil and listing every interface
+        try:
+            import fcntl
+            import struct
+
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                ifreq = fcntl.ioctl(s.fileno(), _SIOCGIFHWADDR, struct.pack("256s", interface[:15].encode()))
+            return ifreq[18:24].hex(":")
+        except OSError:
+            pass
+
     try:
         import psutil
         
@@ -52,29 +89,45 @@ def get_config_dir() -> Path:
     return Path.home() / ".sengled"
 
 def load_bulbs() -> Dict[str, Dict]:
-    """Loads bulb information from the configuration file."""
+    """Loads bulb information from the configuration file.
+
+    The parsed file is cached until its mtime changes; treat the result as read-only.
+    """
+    global _bulbs_cache
     config_dir = get_config_dir()
     bulbs_file = config_dir / "bulbs.json"
-    if not bulbs_file.exists():
+    try:
+        mtime = bulbs_file.stat().st_mtime_ns
+    except FileNotFoundError:
         return {}
+    if _bulbs_cache and _bulbs_cache[0] == bulbs_file and _bulbs_cache[1] == mtime:
+        return _bulbs_cache[2]
     with open(bulbs_file, "r") as f:
-        return json.load(f)
+        bulbs = json.load(f)
+    _bulbs_cache = (bulbs_file, mtime, bulbs)
+    return bulbs
 
 def save_bulb(mac: str, broker_ip: str):
     """Saves a bulb's MAC address and broker IP to the configuration file."""
     config_dir = get_config_dir()
     config_dir.mkdir(exist_ok=True)
     bulbs_file = config_dir / "bulbs.json"
-    bulbs = load_bulbs()
+    global _bulbs_cache
+    bulbs = dict(load_bulbs())
     bulbs[mac] = {"broker": broker_ip}
-    with open(bulbs_file, "w") as f:
-        json.dump(bulbs, f, indent=2)
+    # Write to a temp file and swap it in so a crash never leaves a truncated bulbs.json
+    tmp_file = bulbs_file.with_suffix(".json.tmp")
+    tmp_file.write_text(json.dumps(bulbs, indent=2))
+    os.replace(tmp_file, bulbs_file)
+    # Seed the cache with what we just wrote so the next load_bulbs() skips the re-read
+    _bulbs_cache = (bulbs_file, bulbs_file.stat().st_mtime_ns, bulbs)
 
 def get_bulb_broker(mac: str) -> Optional[str]:
     """Retrieves the broker IP for a given bulb MAC address."""
     bulbs = load_bulbs()
     return bulbs.get(mac, {}).get("broker")
 
+@lru_cache(maxsize=1024)
 def normalize_mac_address(mac: str) -> str:
     """Return MAC in canonical uppercase colon-delimited form (XX:XX:XX:XX:XX:XX).
 
@@ -85,12 +138,12 @@ def normalize_mac_address(mac: str) -> str:
 
     candidate = mac.strip().upper()
     # remove common separators
-    hex_only = re.sub(r"[:-]", "", candidate)
+    hex_only = _MAC_SEP_RE.sub("", candidate)
 
-    if not re.fullmatch(r"[0-9A-F]{12}", hex_only):
+    if not _MAC_HEX_RE.fullmatch(hex_only):
         raise ValueError(f"Invalid MAC address format: {mac}")
 
-    return ":".join(hex_only[i:i+2] for i in range(0, 12, 2))
+    return bytes.fromhex(hex_only).hex(":").upper()
 
 def get_current_epoch_ms() -> int:
     """Returns the current time in milliseconds since the epoch."""
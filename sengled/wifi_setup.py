@@ -1,11 +1,18 @@
 import json
 import time
+import select
 import socket
+import threading
 from pathlib import Path
 from typing import Optional
 
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+try:
+	from orjson import loads as _json_loads
+except ImportError:
+	from json import loads as _json_loads
+
+from http.client import HTTPConnection, HTTPException, RemoteDisconnected
+from urllib.parse import urlsplit
 
 from sengled.utils import get_mac_address
 
@@ -13,11 +20,17 @@ from sengled.utils import get_local_ip, save_bulb
 from sengled.crypto import encrypt_wifi_payload, decrypt_wifi_payload
 from sengled.log import say, step, info, warn as warn_, debug, section, subsection, success, waiting, get_indent, set_indent, is_verbose, cmd
 from sengled.http_server import SetupHTTPServer
-from sengled.mqtt_broker import EmbeddedBroker, BROKER_TLS_PORT
+from sengled.mqtt_broker import EmbeddedBroker, BROKER_TLS_PORT, prefetch_certificates
 from sengled.mqtt_client import MQTTClient, create_mqtt_client
 from sengled.udp import udp_toggle_until_success
 from sengled.constants import BULB_IP, BULB_PORT, SUPPORTED_TYPECODES, COMPATIBLE_IDENTIFY_MARKERS
 
+# Setup-protocol requests never change; encode them once instead of on every retry
+_START_REQ_BYTES = json.dumps({"name": "startConfigRequest", "totalStep": 1, "curStep": 1, "payload": {"protocol": 1}}).encode("utf-8")
+_SCAN_REQ_BYTES = json.dumps({"name": "scanWifiRequest", "totalStep": 1, "curStep": 1, "payload": {}}).encode("utf-8")
+_AP_REQ_BYTES = json.dumps({"name": "getAPListRequest", "totalStep": 1, "curStep": 1, "payload": {}}).encode("utf-8")
+_END_REQ_BYTES = json.dumps({"name": "endConfigRequest", "totalStep": 1, "curStep": 1, "payload": {}}).encode("utf-8")
+
 
 def _listen_for_bulb_attributes(
 	mqtt_client: MQTTClient, bulb_mac: str, timeout: int = 10
@@ -26,18 +39,21 @@ def _listen_for_bulb_attributes(
 	attributes = {}
 	
 	required_attributes = {"typeCode", "identifyNO", "supportAttributes"}
+	# Set by on_message once every required attribute has arrived
+	done = threading.Event()
 	
 	def on_message(client, userdata, msg):
 		nonlocal attributes
 		try:
-			payload = json.loads(msg.payload.decode())
+			payload = _json_loads(msg.payload)
 			if isinstance(payload, list):
 				for item in payload:
 					if "type" in item and "value" in item:
 						attr_type = item["type"]
 						if attr_type in required_attributes:
 							attributes[attr_type] = item["value"]
-							
+				if required_attributes.issubset(attributes):
+					done.set()
 		except (json.JSONDecodeError, UnicodeDecodeError):
 			pass
 
@@ -45,16 +61,57 @@ def _listen_for_bulb_attributes(
 	mqtt_client.client.subscribe(topic)
 	mqtt_client.client.on_message = on_message
 
-	start_time = time.time()
-	while time.time() - start_time < timeout:
-		if required_attributes.issubset(attributes.keys()):
-			break
-		time.sleep(0.5)
+	done.wait(timeout)
 
 	mqtt_client.client.unsubscribe(topic)
 	return attributes
 
 
+def _poll_ap_list(s: socket.socket, max_wait: float = 6.0) -> list:
+	"""Poll getAPListRequest until the bulb reports networks or max_wait elapses."""
+	deadline = time.monotonic() + max_wait
+	delay = 0.25
+	routers = []
+	prev_timeout = s.gettimeout()
+	s.settimeout(1)
+	try:
+		while True:
+			s.sendto(_AP_REQ_BYTES, (BULB_IP, BULB_PORT))
+			try:
+				data, _ = s.recvfrom(4096)
+				resp = _json_loads(data)
+				if isinstance(resp, dict):
+					routers = resp.get("payload", {}).get("routers", [])
+			except (socket.timeout, ValueError):
+				# No answer yet, or a datagram that isn't an AP list
+				pass
+			if routers or time.monotonic() + delay >= deadline:
+				return routers
+			time.sleep(delay)
+			delay = min(delay * 2, 1.0)
+	finally:
+		s.settimeout(prev_timeout)
+		# Retries can leave extra AP-list replies queued; drop them
+		_drain_socket(s)
+
+
+def _drain_socket(s: socket.socket):
+	"""Discard datagrams already queued on s without blocking."""
+	while select.select([s], [], [], 0)[0]:
+		try:
+			s.recvfrom(4096)
+		except OSError:
+			return
+
+
+def _is_ap_list_reply(resp) -> bool:
+	"""True for a getAPList reply, which can arrive late after _poll_ap_list returns."""
+	if not isinstance(resp, dict):
+		return False
+	payload = resp.get("payload")
+	return str(resp.get("name", "")).startswith("getAPList") or (isinstance(payload, dict) and "routers" in payload)
+
+
 def _print_udp_failure_warning(bulb_mac: str):
 	"""Prints a standardized warning when UDP control fails."""
 	warn_("UDP control test failed (non-fatal). If this keeps happening, "
@@ -64,45 +121,84 @@ def _print_udp_failure_warning(bulb_mac: str):
 	say(f"  MQTT ON:  python sengled_tool.py --mac {bulb_mac} --on")
 	say(f"  MQTT OFF: python sengled_tool.py --mac {bulb_mac} --off")
 
-def _probe_server(host: str, port: int, timeout: float = 1.0) -> bool:
-    try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return True
-    except OSError:
-        return False
+def _probe_server(host: str, port: int, timeout: float = 0.05) -> bool:
+    """Return True if something accepts TCP connections on host:port.
+
+    Non-blocking connect bounded by select(): a loopback listener answers in
+    well under the timeout, and a closed port never costs more than it (Windows
+    otherwise retries a refused localhost connect for about two seconds).
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.setblocking(False)
+        try:
+            if s.connect_ex((host, port)) == 0:
+                return True
+            # Windows reports a failed connect in the exception set, not the write set
+            _, writable, failed = select.select([], [s], [s], timeout)
+            return bool(writable) and not failed and s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+        except OSError:
+            return False
 
 # Helpers for external HTTP server in another instance
+# Keep-alive connections to the setup HTTP server, reused across /status polls
+_status_conns: dict[tuple[str, int], HTTPConnection] = {}
+
 def fetch_status(url: str, timeout: float = 3.0) -> Optional[dict]:
-	"""GET {url}, expect JSON: {"last_client_ip": "...", "hit_both_points": bool}."""
-	req = Request(url, headers={"Accept": "application/json"})
-	try:
-		with urlopen(req, timeout=timeout) as resp:
-			body = resp.read().decode("utf-8", errors="replace")
-		data = json.loads(body)
-		if isinstance(data, dict):
-			return data
-	except (HTTPError, URLError, json.JSONDecodeError, TimeoutError):
-		pass
+	"""GET {url}, expect JSON: {"last_client_ip": "...", "hit_both_points": bool}.
+
+	Reuses one keep-alive connection per host:port.
+	"""
+	parts = urlsplit(url)
+	key = (parts.hostname or "127.0.0.1", parts.port or 80)
+	path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+	conn = _status_conns.get(key)
+	if conn is None:
+		conn = _status_conns[key] = HTTPConnection(*key, timeout=timeout)
+	for attempt in range(2):
+		reused = conn.sock is not None
+		conn.timeout = timeout
+		if reused:
+			conn.sock.settimeout(timeout)
+		try:
+			conn.request("GET", path, headers={"Accept": "application/json"})
+			resp = conn.getresponse()
+			body = resp.read()
+			if resp.status == 200:
+				data = _json_loads(body)
+				if isinstance(data, dict):
+					return data
+			return None
+		except (HTTPException, OSError, ValueError) as e:
+			conn.close()
+			# The server may have dropped an idle keep-alive socket; retry once on a fresh one
+			if attempt == 0 and reused and isinstance(e, (RemoteDisconnected, ConnectionError)):
+				continue
+			return None
 	return None
 
 def _poll_status_until_both_hit(
 	url: str,
 	total_timeout_sec: float = 180.0,
 	interval_sec: float = 1.0,
+	long_poll_sec: float = 30.0,
 )-> tuple[bool, Optional[str]]:
 	"""
-	Poll /status until hit_both_points == True or timeout.
+	Long-poll /status?wait=N until hit_both_points == True or timeout.
 	Returns (both_hit, last_client_ip_or_None).
 	"""
 	deadline = time.monotonic() + total_timeout_sec
 	last_ip = None
-	while time.monotonic() < deadline:
-		st = fetch_status(url)
+	while (remaining := deadline - time.monotonic()) > 0:
+		wait = min(long_poll_sec, remaining)
+		started = time.monotonic()
+		st = fetch_status(f"{url}?wait={wait:.0f}", timeout=wait + 5)
 		if st is not None:
 			last_ip = st.get("last_client_ip")
 			if st.get("hit_both_points") is True:
 				return True, last_ip
-		time.sleep(interval_sec)
+		# A server without long-poll support (or an error) answers at once; pace those retries
+		if time.monotonic() - started < interval_sec:
+			time.sleep(interval_sec)
 	return False, last_ip
 
 def run_wifi_setup(
@@ -117,7 +213,7 @@ def run_wifi_setup(
 	    or a dict with keys {"last_client_ip", "support_info"} when using an external server.
 	"""
 	# Capture LAN IP before switching to bulb AP; use this for URLs the bulb will hit
-	lan_ip_before_ap = get_local_ip()
+	lan_ip_before_ap = get_local_ip(refresh=True)
 	local_wifi_ip = lan_ip_before_ap
 	section("Wi-Fi Setup")
 	subsection("Preparation")
@@ -125,19 +221,21 @@ def run_wifi_setup(
 
 	# HTTP endpoint URLs given to the bulb must be reachable after it joins your LAN
 	http_host_for_urls = getattr(args, "http_server_ip", None) or lan_ip_before_ap
+	# First run only: generate broker certificates while the user joins the bulb AP
+	if not getattr(args, "broker_ip", None):
+		prefetch_certificates(Path.home() / ".sengled" / "certs")
 	waiting("Connect to bulb's 'Sengled_Wi-Fi Bulb_XXXXXX' network")
 	print("")
 	try:
 		input("Press Enter to continue — you can connect to your bulb's Wi-Fi before or after (Ctrl+C to cancel)...")
-		from sengled.log import waiting as _waiting
-		_waiting("Looking for bulb...")
+		waiting("Looking for bulb...")
 	except KeyboardInterrupt:
 		print("")  # New line after Ctrl+C
 		warn_("Setup cancelled by user")
 		return None, None, None
 
 	# Refresh local Wi‑Fi IP after user connects to bulb AP (server still binds 0.0.0.0)
-	local_wifi_ip = get_local_ip()
+	local_wifi_ip = get_local_ip(refresh=True)
 
 	# MQTT broker will be started after successful bulb connection
 	_embedded_broker: EmbeddedBroker | None = None
@@ -154,10 +252,9 @@ def run_wifi_setup(
 					s.settimeout(2)
 
 					# Step 1: Initial Handshake
-					start_req = {"name": "startConfigRequest", "totalStep": 1, "curStep": 1, "payload": {"protocol": 1}}
-					s.sendto(json.dumps(start_req).encode("utf-8"), (BULB_IP, BULB_PORT))
+					s.sendto(_START_REQ_BYTES, (BULB_IP, BULB_PORT))
 					data, _ = s.recvfrom(4096)
-					handshake_resp = json.loads(data.decode("utf-8"))
+					handshake_resp = _json_loads(data)
 
 					if "mac" not in handshake_resp.get("payload", {}) and getattr(args, 'mac', None):
 						say("MAC address not provided by bulb, using command line option --mac")
@@ -238,33 +335,31 @@ def run_wifi_setup(
 					if interactive:
 						# Step 2+3: Scan + list with refresh option
 						info("")
-						from sengled.log import set_indent as _si
-						_si(0)
+						set_indent(0)
 						subsection("Wi-Fi Access Points")
-						from sengled.log import get_indent as _gi, set_indent as _si
+						rescanning = False
 						while True:
 							_base = 2  # Start from subsection level
-							_si(_base + 4)
+							set_indent(_base + 4)
 							info("Getting available networks AP from bulb...")
-							scan_req = {"name": "scanWifiRequest", "totalStep": 1, "curStep": 1, "payload": {}}
-							s.sendto(json.dumps(scan_req).encode("utf-8"), (BULB_IP, BULB_PORT))
-							time.sleep(5)
-							ap_req = {"name": "getAPListRequest", "totalStep": 1, "curStep": 1, "payload": {}}
-							s.sendto(json.dumps(ap_req).encode("utf-8"), (BULB_IP, BULB_PORT))
-							data, _ = s.recvfrom(4096)
-							ap_list_resp = json.loads(data.decode("utf-8"))
-							routers = ap_list_resp.get("payload", {}).get("routers", [])
+							s.sendto(_SCAN_REQ_BYTES, (BULB_IP, BULB_PORT))
+							if rescanning:
+								# The bulb would still answer with the previous list, so give the new scan its full time
+								time.sleep(5)
+							# First scan: poll and show the list as soon as the bulb has one
+							routers = _poll_ap_list(s)
+							rescanning = True
 
 							info("")
 							info("Available networks found (enter 0 to rescan):")
 
 							# List entries indented further
 							if not routers:
-								_si(_base + 10)
+								set_indent(_base + 10)
 								info("(none found)")
 							else:
 								max_len = max(len(r.get('ssid','')) for r in routers)
-								_si(_base + 10)
+								set_indent(_base + 10)
 								for i, router in enumerate(routers):
 									ssid = router.get('ssid','')
 									pad = " " * max(1, max_len - len(ssid) + 2)
@@ -272,7 +367,7 @@ def run_wifi_setup(
 									info(f"[{i+1}] {ssid}{pad}{signal_bars}")
 
 							# Prompt slightly less indented than items
-							_si(_base + 6)
+							set_indent(_base + 6)
 							info("")
 							prompt_shown = False
 							while True:
@@ -296,7 +391,7 @@ def run_wifi_setup(
 									chosen_router = routers[choice - 1]
 									wifi_ssid = chosen_router.get("ssid", "")
 									wifi_bssid = chosen_router.get("bssid", "")
-									_si(_base + 6)
+									set_indent(_base + 6)
 									info(f"Selected network: {wifi_ssid}")
 									# Exit both prompt loop and scan loop
 									break
@@ -322,7 +417,7 @@ def run_wifi_setup(
 
 						# For non-interactive, we must assume the SSID is ASCII.
 						# The bulb protocol requires BSSID for non-ASCII SSIDs.
-						if not all(ord(c) < 128 for c in wifi_ssid):
+						if not wifi_ssid.isascii():
 							warn_("Non-ASCII SSIDs are not supported in non-interactive mode because BSSID cannot be determined.")
 							warn_("Please run the setup in interactive mode.")
 							return None, None, None
@@ -334,21 +429,24 @@ def run_wifi_setup(
 					# The bulb requires a fresh handshake before accepting network config
 					# This ensures the setup session is still valid and the bulb is ready
 					rehandshake_step = "[4/6]" if interactive else "[2/4]"
-					s.sendto(json.dumps(start_req).encode("utf-8"), (BULB_IP, BULB_PORT))
-					data, addr = s.recvfrom(4096)
-					re_handshake_resp = json.loads(data.decode("utf-8"))
+					s.sendto(_START_REQ_BYTES, (BULB_IP, BULB_PORT))
+					while True:
+						data, addr = s.recvfrom(4096)
+						re_handshake_resp = _json_loads(data)
+						# Skip AP-list replies that were still in flight after the scan
+						if not _is_ap_list_reply(re_handshake_resp):
+							break
 					if not re_handshake_resp.get("payload", {}).get("result"):
 						warn_("Configuration prep failed")
 						return None, None, None
 
 					# Configure Network
 					config_step = "[5/6]" if interactive else "[3/4]"
-					from sengled.log import set_indent as _si
-					_si(10)
+					set_indent(10)
 					say(">> Sending WiFi credentials to bulb...")
 
 					# Build router config based on SSID content
-					ascii_only = all(ord(c) < 128 for c in wifi_ssid)
+					ascii_only = wifi_ssid.isascii()
 					if ascii_only:
 						router_info = {"ssid": wifi_ssid, "password": wifi_pass}
 					else:
@@ -370,7 +468,7 @@ def run_wifi_setup(
 						},
 					}
 
-					if interactive:
+					if interactive and is_verbose():
 						debug(f"Sending unencrypted payload:\n{json.dumps(params_payload, indent=2)}")
 
 					encrypted_params = encrypt_wifi_payload(params_payload)
@@ -385,7 +483,7 @@ def run_wifi_setup(
 						try:
 							# First, try to parse as JSON (plaintext response)
 							# We handle both cases for maximum compatibility
-							response_json = json.loads(response_str)
+							response_json = _json_loads(response_str)
 							if interactive:
 								debug("Parsed response as plaintext JSON.")
 							if response_json.get("payload", {}).get("result") is not True:
@@ -396,7 +494,7 @@ def run_wifi_setup(
 							if interactive:
 								debug("Could not parse as JSON, attempting decryption...")
 							decrypted_resp = decrypt_wifi_payload(response_str)
-							if interactive:
+							if interactive and is_verbose():
 								debug(f"Decrypted response:\n{json.dumps(decrypted_resp, indent=2)}")
 							if not isinstance(decrypted_resp, dict) or not decrypted_resp.get("payload", {}).get("result"):
 								warn_("Bulb rejected credentials (decryption failed).")
@@ -408,8 +506,7 @@ def run_wifi_setup(
 
 					# End Configuration
 					end_step = "[6/6]" if interactive else "[4/4]"
-					end_req = {"name": "endConfigRequest", "totalStep": 1, "curStep": 1, "payload": {}}
-					s.sendto(json.dumps(end_req).encode("utf-8"), (BULB_IP, BULB_PORT))
+					s.sendto(_END_REQ_BYTES, (BULB_IP, BULB_PORT))
 
 					try:
 						s.recvfrom(4096)
@@ -424,8 +521,7 @@ def run_wifi_setup(
 						success(f"Wi-Fi setup complete for {bulb_mac}", extra_indent=6)
 
 					# 8) Wait for the bulb to contact both endpoints, then keep server running
-					from sengled.log import set_indent as _si
-					_si(0)
+					set_indent(0)
 					section("Verification")
 					waiting("Waiting for bulb to verify setup endpoints, the bulb will be flashing...")
 					if is_verbose():
@@ -9,13 +9,12 @@ import json
 import os
 import sys
 import shutil
-import time
 import socket
 from urllib.parse import urlparse
 import warnings
 import threading
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from pathlib import Path
 from sengled.utils import get_mac_address
 
@@ -28,12 +27,6 @@ from sengled.crypto import (
     encrypt_wifi_payload,
     decrypt_wifi_payload,
 )
-from sengled.mqtt_broker import BROKER_TLS_PORT, EmbeddedBroker
-from sengled.mqtt_client import (
-    MQTTClient,
-    create_mqtt_client as _factory_create_mqtt_client,
-    publish_topic,
-)
 from sengled.utils import (
     get_local_ip,
     save_bulb,
@@ -43,8 +36,6 @@ from sengled.utils import (
     normalize_mac_address,
 )
 from sengled.log import configure, say, step, info, warn, debug, send, recv, section, subsection, success, waiting, result, rule, is_verbose, stop, cmd
-from sengled.http_server import SetupHTTPServer
-from sengled.wifi_setup import run_wifi_setup
 from sengled.firmware_upgrade import (
     prepare_firmware_bin,
     print_upgrade_safety_warning,
@@ -54,8 +45,16 @@ from sengled.firmware_upgrade import (
 )
 from sengled.udp import send_udp_command
 from sengled.constants import BULB_IP, BULB_PORT, DEFAULT_BROKER_PORT
+from sengled.constants import DEFAULT_BROKER_PORT as BROKER_TLS_PORT
 from sengled.command_handler import CommandHandler
 
+# The MQTT broker/client (amqtt, paho, ssl), HTTP server and Wi-Fi setup modules
+# are imported where they are used so that UDP-only runs start quickly.
+if TYPE_CHECKING:
+    from sengled.http_server import SetupHTTPServer
+    from sengled.mqtt_broker import EmbeddedBroker
+    from sengled.mqtt_client import MQTTClient
+
 
 def _print_post_pairing_summary(bulb_mac: str, udp_target_ip: Optional[str]):
     section("Pairing Setup Complete")
@@ -107,12 +106,14 @@ class SengledTool:
     def __init__(self, args):
         self.wifi_crypto = SengledWiFiCrypto()
         self.args = args
-        self._embedded_broker: EmbeddedBroker | None = None
+        self._embedded_broker: "EmbeddedBroker | None" = None
         self.cert_dir = Path.home() / ".sengled" / "certs"
 
     def create_mqtt_client(
         self, broker_host: Optional[str] = None, broker_port: Optional[int] = None
-    ) -> MQTTClient:
+    ) -> "MQTTClient":
+        from sengled.mqtt_client import create_mqtt_client as _factory_create_mqtt_client
+
         return _factory_create_mqtt_client(
             self.args, broker_host=broker_host, broker_port=broker_port
         )
@@ -141,6 +142,8 @@ class SengledTool:
             )
             return lan_ip, port, False
 
+        from sengled.mqtt_broker import EmbeddedBroker
+
         try:
             self._embedded_broker = EmbeddedBroker(
                 self.cert_dir, force_regenerate=force_regenerate, verbose=getattr(self.args, 'verbose', False)
@@ -212,15 +215,21 @@ class SengledTool:
         udp_bulb_ip: str = BULB_IP,
         keep_servers_alive: bool = False,
     ) -> None:
+        from sengled.wifi_setup import run_wifi_setup
+
         run_wifi_setup(self.args, interactive=interactive)
 
     def interactive_wifi_setup(self, broker_ip: str):
+        from sengled.wifi_setup import run_wifi_setup
+
         run_wifi_setup(self.args, interactive=True)
 
     def non_interactive_wifi_setup(self, broker_ip: str, ssid: str, password: str):
+        from sengled.wifi_setup import run_wifi_setup
+
         run_wifi_setup(self.args, interactive=False)
 
-    def _stop_servers(self, setup_server: Optional[SetupHTTPServer] = None):
+    def _stop_servers(self, setup_server: Optional["SetupHTTPServer"] = None):
         if setup_server and hasattr(setup_server, "stop"):
             setup_server.stop()
         broker = self._embedded_broker or (getattr(setup_server, "embedded_broker", None) if setup_server else None)
@@ -308,7 +317,18 @@ class SengledTool:
                 pass
             self._stop_servers(setup_server)
 
+def _wait_forever():
+    """Block the main thread until Ctrl+C."""
+    # An untimed Event.wait() can't be interrupted by Ctrl+C on Windows
+    timeout = 1 if os.name == "nt" else None
+    never_set = threading.Event()
+    while not never_set.wait(timeout):
+        pass
+
+
 def startLocalServer(mqtt_host, mqtt_port, preferred_port):
+    from sengled.http_server import SetupHTTPServer
+
     print("Starting Sengled local server...")
     server = SetupHTTPServer(mqtt_host,mqtt_port,preferred_port)
     started = server.start()
@@ -325,8 +345,7 @@ def startLocalServer(mqtt_host, mqtt_port, preferred_port):
     info("Press Ctrl+C to stop")
 
     try:
-        while True:
-            time.sleep(1)
+        _wait_forever()
     except KeyboardInterrupt:
         server.stop()
         success("Server stopped")
@@ -369,8 +388,7 @@ def handle_run_servers(args, resolved_broker_ip: str):
     say("Press Ctrl+C to stop both servers")
     
     try:
-        while True:
-            time.sleep(1)
+        _wait_forever()
     except KeyboardInterrupt:
         server.stop()
         broker.stop()
@@ -420,6 +438,11 @@ def main():
         action="store_true",
         help="Force regeneration of TLS certificates in the unified location.",
     )
+    parser.add_argument(
+        "--ec-certs",
+        action="store_true",
+        help="With --regen-certs, generate ECDSA P-256 keys instead of RSA-2048 (much faster; the bulb must accept ECDSA).",
+    )
 
     parser.add_argument(
         "--status", action="store_true", help="Send status command (no payload)"
@@ -557,10 +580,14 @@ def main():
     if args.regen_certs:
         cert_dir = Path.home() / ".sengled" / "certs"
         info(f"Regenerating TLS certificates in {cert_dir}")
+        from sengled.mqtt_broker import generate_certificates
+
         try:
-            # Instantiate broker with force_regenerate=True. This handles the logic.
-            # We don't need to start it, just trigger the cert generation.
-            EmbeddedBroker(cert_dir, force_regenerate=True, verbose=getattr(args, 'verbose', False))
+            generate_certificates(
+                cert_dir,
+                force_regenerate=True,
+                ec_keys=getattr(args, 'ec_certs', False),
+            )
             success("Certificates regenerated successfully.")
         except Exception as e:
             warn(f"Failed to regenerate certificates: {e}")
@@ -605,6 +632,8 @@ def main():
             "This tool will guide you through Wi-Fi network setup, bulb control, and firmware flashing."
         )
 
+        from sengled.wifi_setup import run_wifi_setup
+
         try:
             bulb_mac, meta, using_external = run_wifi_setup(args, interactive=is_interactive)
         except KeyboardInterrupt:
@@ -651,6 +680,8 @@ def main():
             "This tool will guide you through Wi-Fi network setup, bulb control, and firmware flashing."
         )
 
+        from sengled.wifi_setup import run_wifi_setup
+
         try:
             bulb_mac, meta, using_external = run_wifi_setup(args, interactive=True)
         except KeyboardInterrupt: